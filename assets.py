@@ -0,0 +1,136 @@
+"""
+Filename: assets.py
+Description: Shared asset cache. Sprites are loaded once per process: the alpha channel used for collision
+masks is decoded with a small NumPy PNG reader, so headless runs never import pygame, and is kept on disk
+between runs; pygame surfaces for drawing are created on first use by the renderer.
+"""
+
+import functools
+import hashlib
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from config import SLUG_SPRITE_FILE, SLUG_SPRITE_SIZE, ASSET_CACHE_DIR
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Bytes per pixel of the supported 8-bit PNG colour types (RGB and RGBA)
+PNG_CHANNELS = {2: 3, 6: 4}
+
+
+def asset_path(name):
+    """Resolves an asset file or directory relative to the package rather than the working directory."""
+    return os.path.join(ROOT, name)
+
+
+def decode_png(data):
+    """Decodes a non-interlaced 8-bit RGB or RGBA PNG into an (height, width, 4) uint8 array."""
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("Not a PNG file")
+    header, idat, pos = None, [], 8
+    while pos < len(data):
+        length, tag = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if tag == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif tag == b"IDAT":
+            idat.append(body)
+        elif tag == b"IEND":
+            break
+        pos += length + 12
+
+    width, height, depth, colour, _, _, interlace = header
+    if depth != 8 or colour not in PNG_CHANNELS or interlace:
+        raise ValueError("Only non-interlaced 8-bit RGB and RGBA PNGs are supported")
+    bpp = PNG_CHANNELS[colour]
+    stride = width * bpp
+
+    raw = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8).reshape(height, stride + 1)
+    pixels = np.zeros((height, stride), dtype=np.uint8)
+    prior = np.zeros(stride, dtype=np.int64)
+    for y in range(height):
+        kind, line = raw[y, 0], raw[y, 1:].astype(np.int64)
+        if kind == 1: # sub: running sum along each channel
+            line = line.reshape(width, bpp).cumsum(axis=0).reshape(stride)
+        elif kind == 2: # up
+            line += prior
+        elif kind in (3, 4): # average and paeth depend on the reconstructed left neighbour
+            for x in range(stride):
+                left = line[x - bpp] if x >= bpp else 0
+                if kind == 3:
+                    line[x] += (left + prior[x]) // 2
+                else:
+                    upper_left = prior[x - bpp] if x >= bpp else 0
+                    estimate = left + prior[x] - upper_left
+                    pa, pb, pc = abs(estimate - left), abs(estimate - prior[x]), abs(estimate - upper_left)
+                    line[x] += left if pa <= pb and pa <= pc else prior[x] if pb <= pc else upper_left
+                line[x] %= 256
+        elif kind != 0:
+            raise ValueError(f"Unknown PNG filter type {kind}")
+        line %= 256
+        pixels[y] = line
+        prior = line
+
+    pixels = pixels.reshape(height, width, bpp)
+    if bpp == 3:
+        pixels = np.concatenate([pixels, np.full((height, width, 1), 255, dtype=np.uint8)], axis=2)
+    return pixels
+
+
+def stretch_indices(source, target):
+    """Source index of every target pixel for pygame.transform.scale's nearest-neighbour stepping."""
+    indices = np.empty(target, dtype=np.intp)
+    index, error = 0, 2 * source - 2 * target
+    for i in range(target):
+        indices[i] = index
+        while error >= 0:
+            index += 1
+            error -= 2 * target
+        error += 2 * source
+    return indices
+
+
+@functools.lru_cache(maxsize=None)
+def sprite_alpha(name=SLUG_SPRITE_FILE, size=SLUG_SPRITE_SIZE):
+    """Returns the sprite's alpha channel scaled to size x size, as a read-only uint8 array indexed [y, x].
+
+    Matches pygame.transform.scale of the loaded image pixel for pixel. The result is cached on disk,
+    keyed by the file contents and size, so only the first run pays for decoding the PNG.
+    """
+    with open(asset_path(name), "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()[:16]
+    cache_dir = asset_path(ASSET_CACHE_DIR)
+    cache_path = os.path.join(cache_dir, f"{os.path.splitext(name)[0]}-{size}-{digest}.npy")
+
+    try:
+        alpha = np.load(cache_path)
+    except (OSError, ValueError):
+        rgba = decode_png(data)
+        rows = stretch_indices(rgba.shape[0], size)
+        cols = stretch_indices(rgba.shape[1], size)
+        alpha = np.ascontiguousarray(rgba[rows][:, cols, 3])
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = cache_path + f".{os.getpid()}.tmp.npy"
+            np.save(tmp, alpha)
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass # a read-only checkout just decodes every time
+
+    alpha.flags.writeable = False
+    return alpha
+
+
+@functools.lru_cache(maxsize=None)
+def sprite_surface(name=SLUG_SPRITE_FILE, size=SLUG_SPRITE_SIZE):
+    """Returns the sprite as a pygame surface scaled to size x size, loaded once per process."""
+    import pygame
+
+    image = pygame.image.load(asset_path(name))
+    if pygame.display.get_surface() is not None:
+        image = image.convert_alpha()
+    return pygame.transform.scale(image, (size, size))
@@ -0,0 +1,176 @@
+"""
+Filename: batch.py
+Description: Headless batch runs of the Cyberslug model. A run is described by a plain dict spec (seed,
+tick count, populations and learning parameters); batches are served from the result cache where
+possible and only the missing specs are simulated, optionally in parallel processes.
+
+Usage:
+    python batch.py --seeds 0 1 2 3 --ticks 5000 --set alpha_hermi=0.3 --set flab_population=8
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import (
+    HERMI_POPULATION_DEFAULT, FLAB_POPULATION_DEFAULT, FAUXFLAB_POPULATION_DEFAULT,
+    ALPHA_HERMI, BETA_HERMI, LAMBDA_HERMI,
+    ALPHA_FLAB, BETA_FLAB, LAMBDA_FLAB,
+    ALPHA_DRUG, BETA_DRUG, LAMBDA_DRUG,
+    WARM_START, AGENT_BACKEND, BATCH_NUMBA_MIN_PREY_MOVES
+)
+
+DEFAULT_SPEC = {
+    "seed": 0,
+    "ticks": 5000,
+    "hermi_population": HERMI_POPULATION_DEFAULT,
+    "flab_population": FLAB_POPULATION_DEFAULT,
+    "fauxflab_population": FAUXFLAB_POPULATION_DEFAULT,
+    "warm_start": WARM_START,
+    "alpha_hermi": ALPHA_HERMI, "beta_hermi": BETA_HERMI, "lambda_hermi": LAMBDA_HERMI,
+    "alpha_flab": ALPHA_FLAB, "beta_flab": BETA_FLAB, "lambda_flab": LAMBDA_FLAB,
+    "alpha_drug": ALPHA_DRUG, "beta_drug": BETA_DRUG, "lambda_drug": LAMBDA_DRUG,
+}
+LEARNING_PARAMETERS = [name for name in DEFAULT_SPEC if name.split("_")[0] in ("alpha", "beta", "lambda")]
+
+# Slug attributes averaged over the run in the summary
+MEAN_FIELDS = ["incentive", "satiation", "app_state", "somatic_map"]
+
+
+def make_spec(**overrides):
+    """Returns DEFAULT_SPEC updated with overrides, rejecting unknown keys."""
+    unknown = set(overrides) - set(DEFAULT_SPEC)
+    if unknown:
+        raise ValueError(f"Unknown run spec keys: {sorted(unknown)}")
+    spec = dict(DEFAULT_SPEC)
+    spec.update(overrides)
+    return spec
+
+
+def batch_backend(spec, backend=AGENT_BACKEND):
+    """Resolves "auto" for one run: numba only when the run is long enough to repay loading it."""
+    if backend != "auto":
+        return backend
+    prey = spec["hermi_population"] + spec["flab_population"] + spec["fauxflab_population"]
+    return "auto" if spec["ticks"] * prey >= BATCH_NUMBA_MIN_PREY_MOVES else "python"
+
+
+def build_simulation(spec):
+    """Creates a Simulation configured from a run spec."""
+    from simulation import Simulation
+    sim = Simulation(
+        seed=spec["seed"],
+        hermi_population=spec["hermi_population"],
+        flab_population=spec["flab_population"],
+        fauxflab_population=spec["fauxflab_population"],
+        warm_start=spec["warm_start"],
+        backend=batch_backend(spec),
+    )
+    for name in LEARNING_PARAMETERS:
+        setattr(sim.cslug, name, spec[name])
+    return sim
+
+
+def run_simulation(spec, record=False):
+    """Runs one spec to completion and returns {"spec", "summary", "trace"}."""
+    from golden import TRACE_FIELDS
+
+    sim = build_simulation(spec)
+    ticks = spec["ticks"]
+    sums = dict.fromkeys(MEAN_FIELDS, 0.0)
+    trace = {name: np.empty(ticks) for name in TRACE_FIELDS} if record else None
+
+    for i in range(ticks):
+        sim.step()
+        for name in MEAN_FIELDS:
+            sums[name] += getattr(sim.cslug, name)
+        if record:
+            for name in TRACE_FIELDS:
+                trace[name][i] = getattr(sim.cslug, name)
+
+    cslug = sim.cslug
+    summary = {
+        "ticks": ticks,
+        "hermi_counter": cslug.hermi_counter,
+        "flab_counter": cslug.flab_counter,
+        "drug_counter": cslug.drug_counter,
+        "Vh": cslug.Vh, "Vf": cslug.Vf, "Vd": cslug.Vd,
+        "nutrition": cslug.nutrition,
+    }
+    for name in MEAN_FIELDS:
+        summary["mean_" + name] = sums[name] / max(1, ticks)
+    return {"spec": spec, "summary": summary, "trace": trace}
+
+
+def _run_uncached(args):
+    spec, record = args
+    return run_simulation(spec, record)
+
+
+def run_batch(specs, cache=None, record=False, workers=1):
+    """Returns results for every spec in order, simulating only those missing from the cache.
+
+    `cache` defaults to a ResultCache in RESULT_CACHE_DIR; pass False to disable caching.
+    """
+    from result_cache import ResultCache, spec_key
+
+    if cache is None:
+        cache = ResultCache()
+    specs = [make_spec(**spec) for spec in specs]
+    keys = [spec_key(spec) for spec in specs]
+    results = [cache.get(key, need_trace=record) if cache else None for key in keys]
+
+    missing = [i for i, result in enumerate(results) if result is None]
+    jobs = [(specs[i], record) for i in missing]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            computed = list(pool.map(_run_uncached, jobs))
+    else:
+        computed = [_run_uncached(job) for job in jobs]
+
+    for i, result in zip(missing, computed):
+        result["key"] = keys[i]
+        result["cached"] = False
+        if cache:
+            cache.put(keys[i], result)
+        results[i] = result
+    return results
+
+
+def parse_assignments(items):
+    """Parses NAME=VALUE strings into spec overrides, keeping the type of booleans and integer defaults."""
+    overrides = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        default = DEFAULT_SPEC.get(name)
+        if isinstance(default, bool):
+            overrides[name] = value.lower() in ("1", "true", "yes", "on")
+        elif isinstance(default, int):
+            overrides[name] = int(value)
+        else:
+            overrides[name] = float(value)
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless Cyberslug simulations in batch.")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--ticks", type=int, default=DEFAULT_SPEC["ticks"])
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a run spec value, may be repeated")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    overrides = parse_assignments(args.set)
+    specs = [make_spec(seed=seed, ticks=args.ticks, **overrides) for seed in args.seeds]
+    results = run_batch(specs, cache=False if args.no_cache else None, workers=args.workers)
+    for result in results:
+        source = "cached" if result["cached"] else "computed"
+        print(f"seed {result['spec']['seed']} ({source}): {result['summary']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,222 @@
+"""
+Filename: collision.py
+Description: Pixel-exact slug/prey collision tests without pygame. RotatedMask gives the mask that
+pygame.transform.rotate followed by pygame.mask.from_surface would produce for the slug sprite, and
+circle_mask reproduces pygame.draw.circle, so encounters match the former pygame path exactly. The rotated
+mask is evaluated lazily, only at the pixels under prey that fall inside its bounding box.
+
+Usage:
+    python collision.py --validate
+"""
+
+import argparse
+import functools
+import math
+import random
+
+import numpy as np
+
+# pygame.mask.from_surface sets a bit where alpha exceeds this threshold
+MASK_THRESHOLD = 127
+
+
+def solid_pixels(alpha, threshold=MASK_THRESHOLD):
+    """Boolean [y, x] mask of the pixels pygame.mask.from_surface would set."""
+    return alpha > threshold
+
+
+def centered_topleft(cx, cy, width, height):
+    """Top-left corner of a width x height pygame.Rect centred on (cx, cy).
+
+    pygame rounds float coordinates half away from zero before centring.
+    """
+    def to_int(value):
+        return int(math.copysign(math.floor(abs(value) + 0.5), value))
+    return to_int(cx) - width // 2, to_int(cy) - height // 2
+
+
+@functools.lru_cache(maxsize=None)
+def circle_mask(radius):
+    """Boolean [y, x] mask of pygame.draw.circle filled on a 2r x 2r surface centred at (r, r)."""
+    size = 2 * radius
+    mask = np.zeros((size, size), dtype=bool)
+
+    def span(x1, y, x2):
+        if 0 <= y < size:
+            mask[y, max(x1, 0):min(x2, size - 1) + 1] = True
+
+    # Midpoint circle with horizontal spans, as in pygame's draw_circle_filled
+    f, ddf_x, ddf_y, x, y = 1 - radius, 0, -2 * radius, 0, radius
+    while x < y:
+        if f >= 0:
+            y -= 1
+            ddf_y += 2
+            f += ddf_y
+        x += 1
+        ddf_x += 2
+        f += ddf_x + 1
+        if f >= 0:
+            span(radius - x, radius + y - 1, radius + x - 1)
+            span(radius - x, radius - y, radius + x - 1)
+        span(radius - y, radius + x - 1, radius + y - 1)
+        span(radius - y, radius - x, radius + y - 1)
+
+    mask.flags.writeable = False
+    return mask
+
+
+class RotatedMask:
+    """Mask of a sprite rotated counter-clockwise by `angle` degrees, as pygame.transform.rotate does it.
+
+    pygame takes the angle as a C float and samples the source with 16.16 fixed-point stepping; the same
+    integer arithmetic is used here so every pixel matches.
+    """
+
+    def __init__(self, solid, angle):
+        self.solid = solid
+        self.angle = angle
+        angle = float(np.float32(angle))
+        height, width = solid.shape
+
+        if math.fmod(angle, 90.0) == 0:
+            # Quarter turns are exact in pygame and keep or swap the dimensions
+            self.array = np.rot90(solid, int(angle) // 90 % 4)
+            self.height, self.width = self.array.shape
+            return
+
+        self.array = None
+        radians = angle * .01745329251994329
+        sin, cos = math.sin(radians), math.cos(radians)
+        cx, cy, sx, sy = cos * width, cos * height, sin * width, sin * height
+        self.width = int(max(abs(cx + sy), abs(cx - sy), abs(-cx + sy), abs(-cx - sy)))
+        self.height = int(max(abs(sx + cy), abs(sx - cy), abs(-sx + cy), abs(-sx - cy)))
+
+        self.isin = int(sin * 65536)
+        self.icos = int(cos * 65536)
+        self.center_y = self.height // 2
+        self.x0 = (self.width << 15) - int(cos * ((self.width - 1) << 15)) + ((width - self.width) << 15)
+        self.y0 = (self.height << 15) - int(sin * ((self.width - 1) << 15)) + ((height - self.height) << 15)
+        self.x_max = (width << 16) - 1
+        self.y_max = (height << 16) - 1
+
+    @property
+    def size(self):
+        return self.width, self.height
+
+    def get(self, xs, ys):
+        """Mask values at integer pixel coordinates of the rotated image; pixels outside it are unset."""
+        xs, ys = np.asarray(xs), np.asarray(ys)
+        inside = (xs >= 0) & (ys >= 0) & (xs < self.width) & (ys < self.height)
+        if self.array is not None:
+            result = np.zeros(xs.shape, dtype=bool)
+            result[inside] = self.array[ys[inside], xs[inside]]
+            return result
+
+        dx = self.x0 + self.isin * (self.center_y - ys) + self.icos * xs
+        dy = self.y0 - self.icos * (self.center_y - ys) + self.isin * xs
+        inside &= (dx >= 0) & (dy >= 0) & (dx <= self.x_max) & (dy <= self.y_max)
+        result = np.zeros(xs.shape, dtype=bool)
+        result[inside] = self.solid[dy[inside] >> 16, dx[inside] >> 16]
+        return result
+
+    def to_array(self):
+        """The full boolean [y, x] mask."""
+        ys, xs = np.mgrid[0:self.height, 0:self.width]
+        return self.get(xs, ys)
+
+    def overlap(self, other, offset):
+        """True when any pixel is set in both masks with `other` placed at offset, like pygame's Mask.overlap."""
+        ox, oy = offset
+        other_height, other_width = other.shape
+        if ox >= self.width or oy >= self.height or ox + other_width <= 0 or oy + other_height <= 0:
+            return False
+        ys, xs = np.nonzero(other)
+        return bool(self.get(xs + ox, ys + oy).any())
+
+
+def _mask_array(mask):
+    """Boolean [y, x] array of a pygame.mask.Mask."""
+    import pygame
+
+    return pygame.surfarray.array_red(mask.to_surface()).T > 0
+
+
+def _circle_surface(radius):
+    """A prey circle drawn by pygame, as the former pygame collision path made it."""
+    import pygame
+
+    surface = pygame.Surface((2 * radius, 2 * radius), pygame.SRCALPHA)
+    pygame.draw.circle(surface, (255, 255, 255), (radius, radius), radius)
+    return surface
+
+
+def validate(samples=2000, seed=0):
+    """Compares the reimplementations with real pygame; returns a description of every mismatch.
+
+    Covers the scaled sprite alpha, circle masks, rotated masks over random and quarter-turn angles,
+    the centred Rect rounding and mask overlaps at random offsets.
+    """
+    import pygame
+
+    from assets import sprite_alpha, sprite_surface
+    from config import PREY_RADIUS
+    from renderer import init_pygame
+
+    init_pygame()
+    rng = random.Random(seed)
+    mismatches = []
+
+    surface = sprite_surface()
+    alpha = sprite_alpha()
+    if not np.array_equal(alpha, pygame.surfarray.array_alpha(surface).T):
+        mismatches.append("sprite alpha differs from pygame.transform.scale")
+    solid = solid_pixels(alpha)
+
+    for radius in range(1, 4 * PREY_RADIUS + 1):
+        if not np.array_equal(circle_mask(radius), _mask_array(pygame.mask.from_surface(_circle_surface(radius)))):
+            mismatches.append(f"circle mask of radius {radius}")
+
+    angles = [90.0 * turn for turn in range(-8, 9)]
+    angles += [rng.uniform(-720, 720) for _ in range(samples)]
+    angles += [float(rng.randint(-720, 720)) for _ in range(samples // 10)]
+    prey_mask = circle_mask(PREY_RADIUS)
+    pygame_prey_mask = pygame.mask.from_surface(_circle_surface(PREY_RADIUS))
+    for angle in angles:
+        rotated = pygame.transform.rotate(surface, angle)
+        expected = pygame.mask.from_surface(rotated)
+        mask = RotatedMask(solid, angle)
+        if mask.size != expected.get_size() or not np.array_equal(mask.to_array(), _mask_array(expected)):
+            mismatches.append(f"rotated mask at {angle!r} degrees")
+            continue
+
+        cx, cy = rng.uniform(-50, 650), rng.uniform(-50, 650)
+        if rng.random() < 0.25:
+            cx, cy = math.floor(cx) + 0.5, math.floor(cy) + 0.5 # exact halves exercise the rounding
+        if centered_topleft(cx, cy, *mask.size) != rotated.get_rect(center=(cx, cy)).topleft:
+            mismatches.append(f"topleft of a {mask.size} rect centred on ({cx!r}, {cy!r})")
+
+        for _ in range(5):
+            offset = (rng.randint(-2 * PREY_RADIUS, mask.width), rng.randint(-2 * PREY_RADIUS, mask.height))
+            if mask.overlap(prey_mask, offset) != (expected.overlap(pygame_prey_mask, offset) is not None):
+                mismatches.append(f"overlap at offset {offset} with the mask at {angle!r} degrees")
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the pygame-free collision masks against pygame.")
+    parser.add_argument("--validate", action="store_true")
+    parser.add_argument("--samples", type=int, default=2000, help="random rotation angles to check")
+    args = parser.parse_args(argv)
+
+    if args.validate:
+        mismatches = validate(args.samples)
+        for mismatch in mismatches[:20]:
+            print(f"Mismatch: {mismatch}")
+        print("Collision masks match pygame" if not mismatches else f"{len(mismatches)} mismatches")
+        return 1 if mismatches else 0
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -11,6 +11,22 @@ EDGE_DISTANCE = 4
 SENSOR_DISTANCE = 4
 PREY_RADIUS = 4
 
+# Slug sprite, drawn and used as the collision mask at SLUG_SPRITE_SIZE pixels square
+SLUG_SPRITE_FILE = "ASIMOV_slug_sprite.png"
+SLUG_SPRITE_SIZE = 80
+
+# Sensor array: angles (degrees from heading, positive = left) and distances (patch cells) per sensor.
+# "nearest" truncates and clamps to the grid like utils.sensors; "bilinear" interpolates with toroidal wrap.
+SENSOR_ANGLES = [45, -45]
+SENSOR_DISTANCES = [SENSOR_DISTANCE, SENSOR_DISTANCE]
+SENSOR_INTERPOLATION = "nearest"
+
+# Per-tick agent math: "python", "numba" (JIT, requires numba) or "auto" (numba when installed)
+AGENT_BACKEND = "auto"
+# Batch runs resolve "auto" to numba only from this many prey moves (ticks x prey); below that, importing
+# numba and loading its JIT cache (about 0.6 s per process) costs more than the kernels save
+BATCH_NUMBA_MIN_PREY_MOVES = 500_000
+
 # Encounter handling
 ENCOUNTER_COOLDOWN = 10
 
@@ -19,6 +35,14 @@ NUM_ODOR_TYPES = 4
 PATCH_WIDTH, PATCH_HEIGHT = 200, 200
 SCALE = PATCH_WIDTH / WIDTH # Assumes WIDTH == HEIGHT
 PATCHES = np.zeros((NUM_ODOR_TYPES, PATCH_WIDTH, PATCH_HEIGHT))
+ODOR_DIFFUSION_SIGMA = 1
+ODOR_DECAY = 0.95
+
+# Warm start: begin runs from the equilibrium odor field of the initial prey positions
+WARM_START = False
+WARM_START_TOLERANCE = 1e-9 # residual at the deposit cells (and step size of the reference iteration)
+WARM_START_MAX_ITERATIONS = 1000
+WARM_START_DIRECT_MAX = 500 # deposit cells up to which the source strengths are solved directly
 
 # Default populations
 HERMI_POPULATION_DEFAULT = 4
@@ -52,8 +76,41 @@ PINK = (255, 105, 180)
 YELLOW = (255, 255, 0)
 RED = (255, 0, 0)
 
+# Odor overlay (log10 range mapped onto the colormap, 1e-7 matches the sensor floor)
+ODOR_OVERLAY_LOG_MIN = -7.0
+ODOR_OVERLAY_LOG_MAX = 0.0
+ODOR_OVERLAY_COLORS = [BROWN, CYAN, PINK, YELLOW] # betaine, hermi, flab, drug
+
+# Frame export
+EXPORT_EVERY_DEFAULT = 10
+EXPORT_QUEUE_SIZE = 32
+EXPORT_WORKERS = 2
+EXPORT_DROP_POLICY = "block" # "block", "drop_newest" or "drop_oldest"
+EXPORT_PNG_LEVEL = 6
+
+# Result cache (relative paths are resolved against the package directory)
+RESULT_CACHE_DIR = "result_cache"
+RESULT_CACHE_MAX_BYTES = 1 << 30
+RESULT_CACHE_EVICT_FRACTION = 0.9 # eviction frees space down to this fraction of the budget
+
+# Decoded assets kept between runs (relative to the package directory)
+ASSET_CACHE_DIR = "asset_cache"
+
+# Sweep work queue (seconds)
+SWEEP_POLL_INTERVAL = 2
+SWEEP_HEARTBEAT_INTERVAL = 30
+SWEEP_STALE_TIMEOUT = 300
+
 # Simulation settings
 TOTAL_TICKS = 1_000_000
 
 # UI settings
-UI_UPDATE_INTERVAL = 100
\ No newline at end of file
+UI_UPDATE_INTERVAL = 100
+
+# Live plots
+PLOT_SERIES = ["incentive", "satiation", "app_state", "somatic_map", "Vh", "Vf", "Vd"]
+PLOT_WINDOWS = [1_000, 10_000, 100_000, 1_000_000]
+PLOT_HISTORY_TICKS = 1_000_000
+PLOT_LEVEL_CAPACITY = 4096 # min/max entries kept per decimation level
+PLOT_DECIMATION_BASE = 4 # ticks per block grow by this factor at each level
+PLOT_UPDATE_INTERVAL = 250 # ms, independent of the simulation rate
\ No newline at end of file
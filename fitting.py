@@ -0,0 +1,237 @@
+"""
+Filename: fitting.py
+Description: Derivative-free fitting of the learning parameters (alpha/beta/lambda per prey type) to
+target foraging behavior. Candidates proposed by a CMA-ES optimizer are scored on headless runs
+across several seeds, evaluated in parallel through batch.run_batch. All candidates of a generation
+share the same seeds (common random numbers), and the optimizer state can be checkpointed and resumed.
+
+Usage:
+    python fitting.py --target hermi_counter=12 --target flab_counter=2 --generations 40 \\
+        --seeds-per-candidate 4 --ticks 5000 --workers 8 --checkpoint fit.json
+"""
+
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+
+from batch import make_spec, run_batch, parse_assignments
+
+# Fitted parameters and their search bounds
+FIT_BOUNDS = {
+    "alpha_hermi": (0.0, 1.0), "alpha_flab": (0.0, 1.0), "alpha_drug": (0.0, 1.0),
+    "beta_hermi": (0.0, 2.0), "beta_flab": (0.0, 2.0), "beta_drug": (0.0, 2.0),
+    "lambda_hermi": (0.0, 2.0), "lambda_flab": (0.0, 2.0), "lambda_drug": (0.0, 2.0),
+}
+FIT_SIGMA0 = 0.3 # initial step size in the normalized [0, 1] box
+OUT_OF_BOUNDS_PENALTY = 1e3
+
+
+class CMAES:
+    """Minimal (mu/mu_w, lambda) CMA-ES with full covariance adaptation."""
+
+    def __init__(self, x0, sigma0, popsize=None, seed=None):
+        n = len(x0)
+        self.n = n
+        self.popsize = popsize or 4 + int(3 * math.log(n))
+        self.mu = self.popsize // 2
+
+        weights = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        self.mueff = 1.0 / np.sum(self.weights ** 2)
+
+        self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+        self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+        self.cmu = min(1 - self.c1, 2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff))
+        self.damps = 1 + 2 * max(0.0, math.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n ** 2))
+
+        self.mean = np.array(x0, dtype=np.float64)
+        self.sigma = float(sigma0)
+        self.C = np.eye(n)
+        self.ps = np.zeros(n)
+        self.pc = np.zeros(n)
+        self.generation = 0
+        self.best_x = self.mean.copy()
+        self.best_loss = math.inf
+        self.rng = np.random.default_rng(seed)
+
+    def _eigen(self):
+        self.C = np.triu(self.C) + np.triu(self.C, 1).T
+        eigenvalues, B = np.linalg.eigh(self.C)
+        D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+        return B, D
+
+    def ask(self):
+        """Samples a generation of candidates as a (popsize, n) array."""
+        B, D = self._eigen()
+        z = self.rng.standard_normal((self.popsize, self.n))
+        return self.mean + self.sigma * (z * D) @ B.T
+
+    def tell(self, xs, losses):
+        """Updates the search distribution from evaluated candidates."""
+        xs = np.asarray(xs)
+        losses = np.asarray(losses)
+        order = np.argsort(losses)
+        if losses[order[0]] < self.best_loss:
+            self.best_loss = float(losses[order[0]])
+            self.best_x = xs[order[0]].copy()
+
+        B, D = self._eigen()
+        old_mean = self.mean
+        selected = (xs[order[:self.mu]] - old_mean) / self.sigma
+        y_w = self.weights @ selected
+        self.mean = old_mean + self.sigma * y_w
+
+        inv_sqrt_C = B @ np.diag(1 / D) @ B.T
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(self.cs * (2 - self.cs) * self.mueff) * inv_sqrt_C @ y_w
+        ps_norm = np.linalg.norm(self.ps)
+        hsig = ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * (self.generation + 1))) / self.chi_n < 1.4 + 2 / (self.n + 1)
+        self.pc = (1 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2 - self.cc) * self.mueff) * y_w
+
+        rank_mu = (selected.T * self.weights) @ selected
+        self.C = (
+            (1 - self.c1 - self.cmu) * self.C
+            + self.c1 * (np.outer(self.pc, self.pc) + (1 - hsig) * self.cc * (2 - self.cc) * self.C)
+            + self.cmu * rank_mu
+        )
+        self.sigma *= math.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+        self.generation += 1
+
+    def state_dict(self):
+        return {
+            "mean": self.mean.tolist(), "sigma": self.sigma, "C": self.C.tolist(),
+            "ps": self.ps.tolist(), "pc": self.pc.tolist(), "generation": self.generation,
+            "best_x": self.best_x.tolist(), "best_loss": self.best_loss,
+            "popsize": self.popsize, "rng": self.rng.bit_generator.state,
+        }
+
+    def load_state(self, state):
+        self.mean = np.array(state["mean"])
+        self.sigma = state["sigma"]
+        self.C = np.array(state["C"])
+        self.ps = np.array(state["ps"])
+        self.pc = np.array(state["pc"])
+        self.generation = state["generation"]
+        self.best_x = np.array(state["best_x"])
+        self.best_loss = state["best_loss"]
+        self.rng.bit_generator.state = state["rng"]
+
+
+def to_parameters(x, names):
+    """Maps a point in the normalized box to clipped parameter values."""
+    values = {}
+    for value, name in zip(np.clip(x, 0.0, 1.0), names):
+        low, high = FIT_BOUNDS[name]
+        values[name] = float(low + value * (high - low))
+    return values
+
+
+def to_normalized(values, names):
+    return np.array([(values[name] - FIT_BOUNDS[name][0]) / (FIT_BOUNDS[name][1] - FIT_BOUNDS[name][0]) for name in names])
+
+
+def foraging_loss(summaries, targets, weights=None):
+    """Weighted squared relative error between seed-averaged summary metrics and targets."""
+    loss = 0.0
+    for name, target in targets.items():
+        mean = np.mean([summary[name] for summary in summaries])
+        scale = max(abs(target), 1.0)
+        loss += (weights or {}).get(name, 1.0) * ((mean - target) / scale) ** 2
+    return float(loss)
+
+
+def generation_seeds(generation, seeds_per_candidate, base_seed=0):
+    """Seeds shared by every candidate of a generation."""
+    start = base_seed + generation * seeds_per_candidate
+    return list(range(start, start + seeds_per_candidate))
+
+
+def evaluate(candidates, names, targets, seeds, base_spec, weights=None, workers=1, cache=False):
+    """Scores candidates on the same seeds, running all (candidate, seed) pairs as one batch."""
+    specs = []
+    for x in candidates:
+        params = to_parameters(x, names)
+        specs += [dict(base_spec, seed=seed, **params) for seed in seeds]
+    results = run_batch(specs, cache=cache, workers=workers)
+
+    losses = []
+    for i, x in enumerate(candidates):
+        summaries = [result["summary"] for result in results[i * len(seeds):(i + 1) * len(seeds)]]
+        penalty = OUT_OF_BOUNDS_PENALTY * float(np.sum((x - np.clip(x, 0.0, 1.0)) ** 2))
+        losses.append(foraging_loss(summaries, targets, weights) + penalty)
+    return losses
+
+
+def save_checkpoint(path, optimizer, names, targets):
+    state = {"parameters": names, "targets": targets, "optimizer": optimizer.state_dict()}
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path, optimizer, names, targets):
+    with open(path) as f:
+        state = json.load(f)
+    if state["parameters"] != names or state["targets"] != targets:
+        raise ValueError(f"Checkpoint {path} was written for different parameters or targets")
+    optimizer.load_state(state["optimizer"])
+
+
+def fit(targets, names=None, generations=30, seeds_per_candidate=4, ticks=5000, popsize=None,
+        workers=1, base_spec=None, weights=None, checkpoint=None, seed=0, cache=False, verbose=True):
+    """Fits the named parameters to targets and returns (best_parameters, best_loss)."""
+    names = list(names or FIT_BOUNDS)
+    base_spec = make_spec(**dict(base_spec or {}, ticks=ticks))
+    optimizer = CMAES(to_normalized(base_spec, names), FIT_SIGMA0, popsize, seed)
+    if checkpoint and os.path.exists(checkpoint):
+        load_checkpoint(checkpoint, optimizer, names, targets)
+
+    while optimizer.generation < generations:
+        candidates = optimizer.ask()
+        seeds = generation_seeds(optimizer.generation, seeds_per_candidate, seed)
+        losses = evaluate(candidates, names, targets, seeds, base_spec, weights, workers, cache)
+        optimizer.tell(candidates, losses)
+        if checkpoint:
+            save_checkpoint(checkpoint, optimizer, names, targets)
+        if verbose:
+            print(f"generation {optimizer.generation}: best {min(losses):.4g}, "
+                  f"overall {optimizer.best_loss:.4g}, sigma {optimizer.sigma:.3g}")
+
+    return to_parameters(optimizer.best_x, names), optimizer.best_loss
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit learning parameters to target foraging behavior.")
+    parser.add_argument("--target", action="append", required=True, metavar="METRIC=VALUE",
+                        help="target for a summary metric from batch.run_simulation, may be repeated")
+    parser.add_argument("--param", action="append", default=None, choices=list(FIT_BOUNDS),
+                        help="parameter to fit (default: all)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="fixed run spec value, may be repeated")
+    parser.add_argument("--generations", type=int, default=30)
+    parser.add_argument("--popsize", type=int, default=None)
+    parser.add_argument("--seeds-per-candidate", type=int, default=4)
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--checkpoint", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    targets = {name: float(value) for name, _, value in (item.partition("=") for item in args.target)}
+    best, loss = fit(
+        targets, args.param, args.generations, args.seeds_per_candidate, args.ticks, args.popsize,
+        args.workers, parse_assignments(args.set), checkpoint=args.checkpoint, seed=args.seed,
+    )
+    print(f"Best loss {loss:.4g}")
+    for name, value in best.items():
+        print(f"  {name} = {value:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,246 @@
+"""
+Filename: frame_export.py
+Description: Headless frame and video export. Renders every Nth tick off-screen and hands the raw RGB
+buffers to writer threads through a bounded queue, encoding either a PNG sequence or a raw rgb24 video
+stream. When encoding falls behind, the configured policy either blocks the simulation (back-pressure)
+or drops frames.
+
+Usage:
+    python frame_export.py --ticks 20000 --every 10 --out frames --format png --policy drop_oldest
+
+A raw export can be converted with, e.g.:
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 600x600 -r 60 -i frames/frames.rgb out.mp4
+"""
+
+import argparse
+import json
+import os
+import queue
+import struct
+import threading
+import zlib
+
+from config import (
+    WIDTH, HEIGHT, FPS,
+    HERMI_POPULATION_DEFAULT, FLAB_POPULATION_DEFAULT, FAUXFLAB_POPULATION_DEFAULT,
+    EXPORT_EVERY_DEFAULT, EXPORT_QUEUE_SIZE, EXPORT_WORKERS, EXPORT_DROP_POLICY, EXPORT_PNG_LEVEL
+)
+
+DROP_POLICIES = ("block", "drop_newest", "drop_oldest")
+
+
+def _png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def encode_png(rgb, width, height, level=EXPORT_PNG_LEVEL):
+    """Encodes packed row-major RGB bytes as a PNG file. zlib releases the GIL while compressing."""
+    stride = width * 3
+    raw = b"".join(b"\x00" + rgb[y * stride:(y + 1) * stride] for y in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + _png_chunk(b"IDAT", zlib.compress(raw, level))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
+class PngSequenceWriter:
+    """Writes each frame to its own numbered PNG file; safe to call from several threads."""
+    ordered = False
+
+    def __init__(self, directory, width=WIDTH, height=HEIGHT, level=EXPORT_PNG_LEVEL):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.width, self.height = width, height
+        self.level = level
+
+    def write(self, tick, rgb):
+        path = os.path.join(self.directory, f"frame_{tick:08d}.png")
+        with open(path, "wb") as f:
+            f.write(encode_png(rgb, self.width, self.height, self.level))
+
+    def close(self):
+        pass
+
+
+class RawVideoWriter:
+    """Appends frames to a single rgb24 stream with a JSON sidecar describing its layout."""
+    ordered = True
+
+    def __init__(self, directory, width=WIDTH, height=HEIGHT, fps=FPS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.width, self.height, self.fps = width, height, fps
+        self.ticks = []
+        self.stream = open(os.path.join(directory, "frames.rgb"), "wb")
+
+    def write(self, tick, rgb):
+        self.stream.write(rgb)
+        self.ticks.append(tick)
+
+    def close(self):
+        self.stream.close()
+        header = {
+            "width": self.width, "height": self.height, "pix_fmt": "rgb24",
+            "fps": self.fps, "frames": len(self.ticks), "ticks": self.ticks,
+        }
+        with open(os.path.join(self.directory, "frames.json"), "w") as f:
+            json.dump(header, f)
+
+
+class FrameExporter:
+    """Bounded producer/consumer queue between the simulation loop and frame writers.
+
+    If the writer raises, the workers keep draining the queue without writing, and the first error is
+    re-raised by the next submit() or by close(), so a failed writer aborts the export instead of
+    leaving the simulation blocked on a full queue.
+    """
+
+    def __init__(self, writer, queue_size=EXPORT_QUEUE_SIZE, policy=EXPORT_DROP_POLICY, workers=EXPORT_WORKERS):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.writer = writer
+        self.policy = policy
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.error = None
+
+        # Ordered writers (a single stream) must be drained by exactly one thread
+        if writer.ordered:
+            workers = 1
+        self.threads = [threading.Thread(target=self._work, daemon=True) for _ in range(max(1, workers))]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, tick, rgb):
+        """Queues a frame; returns False if the frame (or an older one) had to be dropped."""
+        self._raise_error()
+        self.submitted += 1
+        if self.policy == "block":
+            self.queue.put((tick, rgb))
+            return True
+        if self.policy == "drop_newest":
+            try:
+                self.queue.put_nowait((tick, rgb))
+                return True
+            except queue.Full:
+                self._count_drop()
+                return False
+
+        # drop_oldest: evict queued frames until the new one fits
+        dropped_any = False
+        while True:
+            try:
+                self.queue.put_nowait((tick, rgb))
+                return not dropped_any
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                    self._count_drop()
+                    dropped_any = True
+                except queue.Empty:
+                    pass
+
+    def _count_drop(self):
+        with self.lock:
+            self.dropped += 1
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                if self.error is not None:
+                    continue # the export has failed; drain without writing
+                self.writer.write(*item)
+                with self.lock:
+                    self.written += 1
+            except Exception as error:
+                with self.lock:
+                    if self.error is None:
+                        self.error = error
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        """Drains the queue, stops the workers and finalizes the output; re-raises a writer error."""
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.writer.close()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except Exception:
+            if exc is None:
+                raise # otherwise let the exception already in flight (usually this one) propagate
+
+
+def export_run(sim, ticks, exporter, every=EXPORT_EVERY_DEFAULT, renderer=None):
+    """Steps a simulation and submits every Nth rendered frame to the exporter."""
+    if renderer is None:
+        from renderer import Renderer
+        renderer = Renderer()
+    for _ in range(ticks):
+        sim.step()
+        if sim.tick % every == 0:
+            renderer.render(sim)
+            exporter.submit(sim.tick, renderer.tostring())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a headless Cyberslug run to frames.")
+    parser.add_argument("--out", default="frames")
+    parser.add_argument("--format", choices=("png", "raw"), default="png")
+    parser.add_argument("--ticks", type=int, default=10_000)
+    parser.add_argument("--every", type=int, default=EXPORT_EVERY_DEFAULT)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--hermi", type=int, default=HERMI_POPULATION_DEFAULT)
+    parser.add_argument("--flab", type=int, default=FLAB_POPULATION_DEFAULT)
+    parser.add_argument("--fauxflab", type=int, default=FAUXFLAB_POPULATION_DEFAULT)
+    parser.add_argument("--queue-size", type=int, default=EXPORT_QUEUE_SIZE)
+    parser.add_argument("--policy", choices=DROP_POLICIES, default=EXPORT_DROP_POLICY)
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS)
+    parser.add_argument("--overlay", default="off", help="odor overlay mode, see odor_overlay.OVERLAY_MODES")
+    parser.add_argument("--sensors", action="store_true", help="draw the sensor positions")
+    args = parser.parse_args(argv)
+
+    from simulation import Simulation
+    from renderer import Renderer
+
+    sim = Simulation(seed=args.seed, hermi_population=args.hermi,
+                     flab_population=args.flab, fauxflab_population=args.fauxflab)
+    renderer = Renderer()
+    renderer.odor_overlay.set_mode(args.overlay)
+    renderer.show_sensors = args.sensors
+
+    if args.format == "png":
+        writer = PngSequenceWriter(args.out)
+    else:
+        writer = RawVideoWriter(args.out)
+
+    with FrameExporter(writer, args.queue_size, args.policy, args.workers) as exporter:
+        export_run(sim, args.ticks, exporter, args.every, renderer)
+
+    print(f"Wrote {exporter.written} frames to {args.out} ({exporter.dropped} dropped)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,221 @@
+"""
+Filename: golden.py
+Description: Golden-trajectory harness. Records seeded reference traces from the reference engine and
+compares alternative engines against them, reporting the first tick where any quantity diverges.
+
+Usage:
+    python golden.py record --seeds 0 1 2 --ticks 5000 --out golden
+    python golden.py compare golden --engine mymodule:make_engine
+"""
+
+import argparse
+import hashlib
+import importlib
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from config import PATCH_WIDTH, PATCH_HEIGHT
+
+# Slug attributes recorded every tick
+TRACE_FIELDS = (
+    "x", "y", "angle", "turn_angle",
+    "Vh", "Vf", "Vd",
+    "incentive", "satiation", "app_state", "app_state_switch", "somatic_map",
+    "hermi_counter", "flab_counter", "drug_counter",
+)
+COUNTER_FIELDS = ("hermi_counter", "flab_counter", "drug_counter")
+
+# Odor field snapshots
+ODOR_INTERVAL = 100
+ODOR_SAMPLE_STRIDE = 10
+
+# Absolute tolerances per quantity; anything not listed uses DEFAULT_TOLERANCE
+DEFAULT_TOLERANCE = 1e-9
+DEFAULT_TOLERANCES = {name: 0 for name in COUNTER_FIELDS}
+
+Divergence = namedtuple("Divergence", ["seed", "tick", "quantity", "expected", "actual"])
+
+
+def default_engine(seed):
+    """Builds the reference engine for a seed."""
+    from simulation import Simulation
+    return Simulation(seed=seed)
+
+
+def load_engine_factory(spec):
+    """Resolves a 'module:callable' string to an engine factory."""
+    module_name, _, attr = spec.partition(":")
+    factory = getattr(importlib.import_module(module_name), attr or "Simulation")
+    return lambda seed: factory(seed=seed)
+
+
+def odor_hash(patches):
+    """Returns a digest of the exact float64 contents of an odor field."""
+    return hashlib.sha1(np.ascontiguousarray(patches, dtype=np.float64).tobytes()).hexdigest()
+
+
+def odor_samples(patches):
+    """Returns a strided subgrid of every odor channel, for tolerance-based field comparison."""
+    return np.array(patches[:, ::ODOR_SAMPLE_STRIDE, ::ODOR_SAMPLE_STRIDE], dtype=np.float64)
+
+
+def record_trajectory(seed, ticks, engine_factory=default_engine, odor_interval=ODOR_INTERVAL):
+    """Runs an engine for a number of ticks and returns its trace as a dict of arrays."""
+    engine = engine_factory(seed)
+    trace = {name: np.empty(ticks, dtype=np.float64) for name in TRACE_FIELDS}
+    odor_ticks, hashes, samples = [], [], []
+
+    for i in range(ticks):
+        engine.step()
+        for name in TRACE_FIELDS:
+            trace[name][i] = getattr(engine.cslug, name)
+        if engine.tick % odor_interval == 0:
+            odor_ticks.append(engine.tick)
+            hashes.append(odor_hash(engine.patches))
+            samples.append(odor_samples(engine.patches))
+
+    trace["seed"] = np.array(seed)
+    trace["ticks"] = np.arange(1, ticks + 1)
+    trace["odor_ticks"] = np.array(odor_ticks, dtype=np.int64)
+    trace["odor_hashes"] = np.array(hashes, dtype="U40")
+    trace["odor_samples"] = (
+        np.stack(samples) if samples
+        else np.empty((0, engine.patches.shape[0], PATCH_WIDTH // ODOR_SAMPLE_STRIDE,
+                       PATCH_HEIGHT // ODOR_SAMPLE_STRIDE))
+    )
+    return trace
+
+
+def save_trajectory(path, trace):
+    np.savez_compressed(path, **trace)
+
+
+def load_trajectory(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _first_mismatch(expected, actual, tolerance):
+    """Returns the first index along axis 0 where the arrays differ by more than the tolerance."""
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    n = min(len(expected), len(actual))
+    diff = np.abs(expected[:n] - actual[:n]).reshape(n, -1)
+    bad = (diff > tolerance) | (np.isnan(expected[:n]) != np.isnan(actual[:n])).reshape(n, -1)
+    rows = np.flatnonzero(bad.any(axis=1))
+    if len(rows):
+        return int(rows[0])
+    if len(expected) != len(actual):
+        return n
+    return None
+
+
+def compare_trajectories(reference, candidate, tolerances=None, check_hashes=False):
+    """Compares two traces and returns the earliest Divergence, or None if they agree.
+
+    Per-tick quantities are checked with absolute tolerances from `tolerances`, falling back to
+    DEFAULT_TOLERANCES and DEFAULT_TOLERANCE. The sampled odor field is checked under the key
+    "odor_samples". Exact odor hashes are only compared when `check_hashes` is set, since any engine
+    that reorders floating point operations will change them.
+    """
+    tols = dict(DEFAULT_TOLERANCES)
+    tols.update(tolerances or {})
+    ticks = reference["ticks"]
+    seed = int(reference["seed"])
+    found = []
+
+    for name in TRACE_FIELDS:
+        index = _first_mismatch(reference[name], candidate[name], tols.get(name, DEFAULT_TOLERANCE))
+        if index is not None:
+            actual = candidate[name][index] if index < len(candidate[name]) else None
+            found.append(Divergence(seed, int(ticks[index]), name, reference[name][index], actual))
+
+    odor_ticks = reference["odor_ticks"]
+    index = _first_mismatch(reference["odor_samples"], candidate["odor_samples"],
+                            tols.get("odor_samples", DEFAULT_TOLERANCE))
+    if index is not None and index < len(odor_ticks):
+        expected = reference["odor_samples"][index]
+        actual = candidate["odor_samples"][index] if index < len(candidate["odor_samples"]) else None
+        error = None if actual is None else float(np.max(np.abs(expected - actual)))
+        # For the field, report the largest absolute sample error rather than a single value
+        found.append(Divergence(seed, int(odor_ticks[index]), "odor_samples", None, error))
+
+    if check_hashes:
+        for index, (expected, actual) in enumerate(zip(reference["odor_hashes"], candidate["odor_hashes"])):
+            if expected != actual:
+                found.append(Divergence(seed, int(odor_ticks[index]), "odor_hash", str(expected), str(actual)))
+                break
+
+    if not found:
+        return None
+    return min(found, key=lambda d: d.tick)
+
+
+def trace_path(directory, seed):
+    return os.path.join(directory, f"seed_{seed}.npz")
+
+
+def record_golden(directory, seeds, ticks, engine_factory=default_engine):
+    """Records reference traces for several seeds into a directory."""
+    os.makedirs(directory, exist_ok=True)
+    for seed in seeds:
+        save_trajectory(trace_path(directory, seed), record_trajectory(seed, ticks, engine_factory))
+
+
+def check_engine(directory, engine_factory, tolerances=None, check_hashes=False):
+    """Replays every recorded seed with a candidate engine and returns a list of divergences."""
+    results = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".npz"):
+            continue
+        reference = load_trajectory(os.path.join(directory, filename))
+        candidate = record_trajectory(int(reference["seed"]), len(reference["ticks"]), engine_factory)
+        divergence = compare_trajectories(reference, candidate, tolerances, check_hashes)
+        if divergence is not None:
+            results.append(divergence)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record reference traces")
+    record.add_argument("--out", default="golden")
+    record.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    record.add_argument("--ticks", type=int, default=5000)
+    record.add_argument("--engine", default=None, help="module:callable engine factory")
+
+    compare = commands.add_parser("compare", help="compare an engine against recorded traces")
+    compare.add_argument("directory")
+    compare.add_argument("--engine", default="simulation:Simulation")
+    compare.add_argument("--tol", action="append", default=[], metavar="NAME=VALUE",
+                         help="per-quantity absolute tolerance, may be repeated")
+    compare.add_argument("--check-hashes", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        factory = load_engine_factory(args.engine) if args.engine else default_engine
+        record_golden(args.out, args.seeds, args.ticks, factory)
+        print(f"Recorded {len(args.seeds)} traces of {args.ticks} ticks to {args.out}")
+        return 0
+
+    tolerances = {}
+    for item in args.tol:
+        name, _, value = item.partition("=")
+        tolerances[name] = float(value)
+    divergences = check_engine(args.directory, load_engine_factory(args.engine), tolerances, args.check_hashes)
+    if not divergences:
+        print("All traces match")
+        return 0
+    for d in divergences:
+        print(f"seed {d.seed}: first divergence at tick {d.tick} in {d.quantity} "
+              f"(expected {d.expected}, got {d.actual})")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,410 @@
+"""
+Filename: kernels.py
+Description: Pluggable backends for the per-tick agent math. The kernels below mirror Cyberslug.update and
+Prey.move operation for operation on plain floats and arrays. The "numba" backend JIT-compiles them when
+numba is installed; the "python" backend keeps the original object code. The two can be selected at
+runtime and checked against each other. Under a compiled backend the prey positions and headings live in
+a PreyArrays owned by the simulation, so the prey kernel runs on them in place.
+
+Usage:
+    python kernels.py --validate --bench
+"""
+
+import argparse
+import importlib.util
+import math
+import random
+import time
+
+import numpy as np
+
+from config import WIDTH, HEIGHT, NUM_ODOR_TYPES, ENCOUNTER_COOLDOWN, AGENT_BACKEND
+from sluggame import Prey, Cyberslug
+
+BACKENDS = ("python", "numba")
+ENCOUNTER_CODES = {"none": 0, "hermi": 1, "flab": 2, "drug": 3}
+
+
+# Cyberslug attributes held in the compiled slug's state array, in index order
+STATE_FIELDS = [
+    "Vh", "Vf", "Vd", "nutrition", "app_state_switch",
+    "encounter_timer", "hermi_counter", "flab_counter", "drug_counter",
+    "alpha_hermi", "beta_hermi", "lambda_hermi",
+    "alpha_flab", "beta_flab", "lambda_flab",
+    "alpha_drug", "beta_drug", "lambda_drug",
+    "sns_pain_left", "sns_pain_right", "spontaneous_pain", "reward_experience",
+    "sns_pain", "pain", "pain_switch", "satiation", "reward_pos", "reward_neg",
+    "incentive", "somatic_map", "app_state", "turn_angle",
+]
+INT_FIELDS = {"encounter_timer", "hermi_counter", "flab_counter", "drug_counter"}
+(I_VH, I_VF, I_VD, I_NUTRITION, I_APP_STATE_SWITCH,
+ I_ENCOUNTER_TIMER, I_HERMI_COUNTER, I_FLAB_COUNTER, I_DRUG_COUNTER,
+ I_ALPHA_HERMI, I_BETA_HERMI, I_LAMBDA_HERMI,
+ I_ALPHA_FLAB, I_BETA_FLAB, I_LAMBDA_FLAB,
+ I_ALPHA_DRUG, I_BETA_DRUG, I_LAMBDA_DRUG,
+ I_SNS_PAIN_LEFT, I_SNS_PAIN_RIGHT, I_SPONTANEOUS_PAIN, I_REWARD_EXPERIENCE,
+ I_SNS_PAIN, I_PAIN, I_PAIN_SWITCH, I_SATIATION, I_REWARD_POS, I_REWARD_NEG,
+ I_INCENTIVE, I_SOMATIC_MAP, I_APP_STATE, I_TURN_ANGLE) = range(len(STATE_FIELDS))
+
+
+def slug_update_kernel(left, right, encounter, state, sns_out):
+    """Cyberslug.update on a state array, in place; sns_out rows receive the left, right and mean senses.
+
+    `encounter` is one of ENCOUNTER_CODES. See Cyberslug.update for the model itself.
+    """
+    n = left.shape[0]
+    sns_left, sns_right, sns = sns_out[0], sns_out[1], sns_out[2]
+    for k in range(n):
+        sns_left[k] = 0.0 if left[k] <= 1e-7 else (7 + math.log10(left[k]))
+        sns_right[k] = 0.0 if right[k] <= 1e-7 else (7 + math.log10(right[k]))
+        sns[k] = (sns_left[k] + sns_right[k]) / 2
+    sns_betaine, sns_hermi, sns_flab, sns_drug = sns[0], sns[1], sns[2], sns[3]
+
+    Vh, Vf, Vd = state[I_VH], state[I_VF], state[I_VD]
+    nutrition = state[I_NUTRITION]
+    encounter_timer = state[I_ENCOUNTER_TIMER]
+
+    # Associative learning from prey encounters
+    if encounter == 1:
+        Vh += state[I_ALPHA_HERMI] * state[I_BETA_HERMI] * (state[I_LAMBDA_HERMI] - Vh)
+        nutrition += 0.1
+        if encounter_timer == 0:
+            state[I_HERMI_COUNTER] += 1
+            encounter_timer = ENCOUNTER_COOLDOWN
+    if encounter == 2:
+        Vf += state[I_ALPHA_FLAB] * state[I_BETA_FLAB] * (state[I_LAMBDA_FLAB] - Vf)
+        nutrition += 0.1
+        if encounter_timer == 0:
+            state[I_FLAB_COUNTER] += 1
+            encounter_timer = ENCOUNTER_COOLDOWN
+    if encounter == 3:
+        Vd += state[I_ALPHA_DRUG] * state[I_BETA_DRUG] * (state[I_LAMBDA_DRUG] - Vd)
+        if encounter_timer == 0:
+            state[I_DRUG_COUNTER] += 1
+            encounter_timer = ENCOUNTER_COOLDOWN
+
+    # Pain
+    sns_pain_left, sns_pain_right = state[I_SNS_PAIN_LEFT], state[I_SNS_PAIN_RIGHT]
+    sns_pain = (sns_pain_left + sns_pain_right) / 2
+    pain = 10 / (1 + math.exp(-2 * (sns_pain + state[I_SPONTANEOUS_PAIN]) + 10))
+    pain_switch = 1 - 2 / (1 + math.exp(-10 * (sns_pain - 0.2)))
+
+    # Nutrition, satiation and incentive
+    nutrition -= 0.005 * nutrition
+    satiation = 1 / ((1 + 0.7 * math.exp(-4 * nutrition + 2)) ** 2)
+    reward_pos = (
+        sns_betaine / (1 + (0.05 * Vh * sns_hermi) - 0.006 / satiation)
+        + 3.0 * Vh * sns_hermi
+        + 8.0 * Vd * sns_drug)
+    reward_neg = 0.59 * Vf * sns_flab
+    incentive = reward_pos - reward_neg
+
+    # Somatic map over (hermi, flab, drug, pain), summed left to right as in the Python version
+    senses_total = 0.0
+    for k in range(4):
+        l = sns_pain_left if k == 3 else sns_left[k + 1]
+        r = sns_pain_right if k == 3 else sns_right[k + 1]
+        senses_total += (l + r) / 2
+    somatic_sum = 0.0
+    for k in range(4):
+        l = sns_pain_left if k == 3 else sns_left[k + 1]
+        r = sns_pain_right if k == 3 else sns_right[k + 1]
+        factor = pain if k == 3 else 2 * ((l + r) / 2) - senses_total
+        somatic_sum += (r - l) / (1 + math.exp(-50 * factor))
+    somatic_map = -somatic_sum
+
+    # Appetitive state and turn angle
+    app_state = 0.01 + (
+        1 / (1 + math.exp(-(1 * incentive - 8 * satiation - 0.1 * pain - 0.1 * pain_switch * state[I_REWARD_EXPERIENCE])))
+        + 0.1 * ((state[I_APP_STATE_SWITCH] - 1) * 0.5)
+    )
+    app_state_switch = (-2 / (1 + math.exp(-100 * (app_state - 0.245)))) + 1
+    turn_angle = 3 * ((2 * app_state_switch) / (1 + math.exp(3 * somatic_map)) - app_state_switch)
+
+    if encounter_timer > 0:
+        encounter_timer -= 1
+
+    state[I_VH], state[I_VF], state[I_VD] = Vh, Vf, Vd
+    state[I_NUTRITION] = nutrition
+    state[I_ENCOUNTER_TIMER] = encounter_timer
+    state[I_SNS_PAIN], state[I_PAIN], state[I_PAIN_SWITCH] = sns_pain, pain, pain_switch
+    state[I_SATIATION], state[I_REWARD_POS], state[I_REWARD_NEG] = satiation, reward_pos, reward_neg
+    state[I_INCENTIVE], state[I_SOMATIC_MAP] = incentive, somatic_map
+    state[I_APP_STATE], state[I_APP_STATE_SWITCH], state[I_TURN_ANGLE] = app_state, app_state_switch, turn_angle
+
+
+def prey_move_kernel(state, count, draws):
+    """Prey.move for the first `count` prey of a PreyArrays state (rows x, y, angle), in place.
+
+    `draws` are the prey's random() values in list order; Prey.move turns each into uniform(-1, 1), which
+    is -1 + 2 * random().
+    """
+    step = 0.1
+    for k in range(count):
+        state[2, k] += 2.0 * draws[k] - 1.0
+        state[0, k] += step * math.cos(math.radians(state[2, k]))
+        state[1, k] += step * math.sin(math.radians(state[2, k]))
+        state[0, k] = state[0, k] % WIDTH
+        state[1, k] = state[1, k] % HEIGHT
+
+
+class Backend:
+    """A named pair of kernels; None means the original per-object Python code is used."""
+
+    def __init__(self, name, slug_update=None, prey_move=None):
+        self.name = name
+        self.slug_update = slug_update
+        self.prey_move = prey_move
+
+
+class CompiledCyberslug(Cyberslug):
+    """Cyberslug whose update runs a compiled kernel.
+
+    The attributes in STATE_FIELDS live in one float64 array behind properties, so a tick costs a single
+    kernel call with no per-attribute marshalling. The sense lists become rows of `sns_out`, and the
+    per-sense somatic map lists of the Python version are not kept.
+    """
+
+    def __init__(self, kernel):
+        self._init_arrays(kernel)
+        super().__init__()
+        self.sns_odors_left, self.sns_odors_right, self.sns_odors = self.sns_out
+
+    def _init_arrays(self, kernel):
+        self.state = np.zeros(len(STATE_FIELDS))
+        self.sns_out = np.zeros((3, NUM_ODOR_TYPES))
+        self.kernel = kernel
+
+    @classmethod
+    def from_slug(cls, slug, kernel):
+        """Copies a Python Cyberslug (or another compiled one) into a new compiled slug."""
+        new = cls.__new__(cls)
+        new._init_arrays(kernel)
+        for name in STATE_FIELDS:
+            setattr(new, name, getattr(slug, name, 0.0))
+        for name, value in vars(slug).items():
+            if name not in ("state", "sns_out", "kernel") and name not in STATE_FIELDS:
+                setattr(new, name, value)
+        new.sns_out[0], new.sns_out[1], new.sns_out[2] = slug.sns_odors_left, slug.sns_odors_right, slug.sns_odors
+        new.sns_odors_left, new.sns_odors_right, new.sns_odors = new.sns_out
+        return new
+
+    def to_slug(self):
+        """Returns an equivalent plain Cyberslug."""
+        slug = Cyberslug.__new__(Cyberslug)
+        for name, value in vars(self).items():
+            if name not in ("state", "sns_out", "kernel"):
+                setattr(slug, name, value)
+        for name in STATE_FIELDS:
+            setattr(slug, name, getattr(self, name))
+        slug.sns_odors_left, slug.sns_odors_right, slug.sns_odors = (row.tolist() for row in self.sns_out)
+        return slug
+
+    def update(self, sensors_left, sensors_right, encounter):
+        self.kernel(np.asarray(sensors_left, dtype=np.float64), np.asarray(sensors_right, dtype=np.float64),
+                    ENCOUNTER_CODES[encounter], self.state, self.sns_out)
+        self.debug_report(encounter)
+        return self.turn_angle
+
+
+def _state_property(index, cast):
+    def get(self):
+        return cast(self.state[index])
+
+    def set(self, value):
+        self.state[index] = value
+
+    return property(get, set)
+
+
+for _index, _name in enumerate(STATE_FIELDS):
+    setattr(CompiledCyberslug, _name, _state_property(_index, int if _name in INT_FIELDS else float))
+
+
+def convert_slug(slug, backend):
+    """Returns the slug in the form the backend runs: compiled for kernels, plain for "python"."""
+    if backend.slug_update is not None:
+        return CompiledCyberslug.from_slug(slug, backend.slug_update)
+    if isinstance(slug, CompiledCyberslug):
+        return slug.to_slug()
+    return slug
+
+
+class PreyArrays:
+    """x, y and heading of a population of prey as the rows of one float64 array, one column per prey.
+
+    Columns are kept in prey list order, which is also the order the heading changes are drawn in.
+    Removal moves the last column into the freed slot, matching the swap-remove of the prey list.
+    """
+
+    def __init__(self, capacity=64):
+        self.state = np.zeros((3, capacity))
+        self.count = 0
+
+    def allocate(self):
+        """Returns a new slot at the end, growing the array when full."""
+        if self.count == self.state.shape[1]:
+            grown = np.zeros((3, 2 * self.state.shape[1]))
+            grown[:, :self.count] = self.state[:, :self.count]
+            self.state = grown
+        self.count += 1
+        return self.count - 1
+
+    def release(self, slot):
+        """Frees a slot by moving the last column into it."""
+        self.count -= 1
+        self.state[:, slot] = self.state[:, self.count]
+
+    def clear(self):
+        self.count = 0
+
+
+class ArrayPrey(Prey):
+    """Prey whose x, y and angle are its `slot` column of a PreyArrays, behind properties."""
+
+    @classmethod
+    def from_prey(cls, prey, arrays):
+        """Copies a plain Prey into the next column of `arrays`."""
+        new = cls.__new__(cls)
+        new.arrays = arrays
+        new.slot = arrays.allocate()
+        new.x, new.y, new.angle = prey.x, prey.y, prey.angle
+        for name, value in vars(prey).items():
+            if name not in ("arrays", "slot", "x", "y", "angle"):
+                setattr(new, name, value)
+        return new
+
+    def to_prey(self):
+        """Returns an equivalent plain Prey."""
+        prey = Prey.__new__(Prey)
+        for name, value in vars(self).items():
+            if name != "arrays":
+                setattr(prey, name, value)
+        prey.x, prey.y, prey.angle = self.x, self.y, self.angle
+        return prey
+
+
+def _prey_property(row):
+    def get(self):
+        return float(self.arrays.state[row, self.slot])
+
+    def set(self, value):
+        self.arrays.state[row, self.slot] = value
+
+    return property(get, set)
+
+
+ArrayPrey.x, ArrayPrey.y, ArrayPrey.angle = (_prey_property(row) for row in range(3))
+
+
+def convert_prey(prey_list, arrays, backend):
+    """Returns the prey in the form the backend moves: columns of `arrays` for kernels, plain for "python".
+
+    The arrays are refilled in list order, so a prey's slot stays its list index.
+    """
+    plain = [prey.to_prey() if isinstance(prey, ArrayPrey) else prey for prey in prey_list]
+    arrays.clear()
+    if backend.prey_move is None:
+        return plain
+    return [ArrayPrey.from_prey(prey, arrays) for prey in plain]
+
+
+def move_prey(prey_list, arrays, backend, rng=random):
+    """Moves all prey; kernel backends update the prey arrays in place."""
+    if backend.prey_move is None:
+        for prey in prey_list:
+            prey.move()
+        return
+
+    # One draw per prey in list order, so the random stream matches Prey.move
+    draw = rng.random
+    backend.prey_move(arrays.state, arrays.count, np.array([draw() for _ in range(arrays.count)]))
+
+
+_compiled = {}
+
+
+def numba_available():
+    """Checks for numba without importing it; the import is deferred until the backend is requested."""
+    return importlib.util.find_spec("numba") is not None
+
+
+def get_backend(name=AGENT_BACKEND):
+    """Returns the Backend for "python", "numba" or "auto" (numba when available)."""
+    if name == "auto":
+        name = "numba" if numba_available() else "python"
+    if name == "python":
+        return Backend("python")
+    if name != "numba":
+        raise ValueError(f"Unknown agent backend: {name}")
+    if not numba_available():
+        raise ImportError("The numba backend requires the numba package")
+    if not _compiled:
+        import numba
+        _compiled["slug_update"] = numba.njit(cache=True)(slug_update_kernel)
+        _compiled["prey_move"] = numba.njit(cache=True)(prey_move_kernel)
+    return Backend("numba", _compiled["slug_update"], _compiled["prey_move"])
+
+
+def validate_backends(seeds=(0, 1, 2), ticks=2000, tolerances=None):
+    """Runs the same seeds on both backends and returns the golden-harness divergences."""
+    from golden import record_trajectory, compare_trajectories
+    from simulation import Simulation
+
+    divergences = []
+    for seed in seeds:
+        reference = record_trajectory(seed, ticks, lambda s: Simulation(seed=s, backend="python"))
+        candidate = record_trajectory(seed, ticks, lambda s: Simulation(seed=s, backend="numba"))
+        divergence = compare_trajectories(reference, candidate, tolerances)
+        if divergence is not None:
+            divergences.append(divergence)
+    return divergences
+
+
+def benchmark(backend, ticks=2000, seed=0, prey=None):
+    """Returns microseconds per tick spent in the agent updates (prey moves and slug update).
+
+    `prey` overrides the population of every prey type.
+    """
+    from simulation import Simulation
+
+    populations = {} if prey is None else dict.fromkeys(
+        ("hermi_population", "flab_population", "fauxflab_population"), prey)
+    sim = Simulation(seed=seed, backend=backend, **populations)
+    sim.run(10) # warm up, including JIT compilation
+    cslug = sim.cslug
+    left, right = sim.sensor_array.read(cslug.x, cslug.y, cslug.angle)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.move_prey()
+        sim.cslug.update(left, right, "none")
+    return (time.perf_counter() - start) / ticks * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and benchmark the agent kernel backends.")
+    parser.add_argument("--validate", action="store_true")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--prey", type=int, default=None, help="benchmark population of each prey type")
+    args = parser.parse_args(argv)
+
+    if not numba_available():
+        print("numba is not installed; only the python backend is available")
+        return 1
+    status = 0
+    if args.validate:
+        divergences = validate_backends(ticks=args.ticks)
+        for d in divergences:
+            print(f"seed {d.seed}: backends diverge at tick {d.tick} in {d.quantity} "
+                  f"(python {d.expected}, numba {d.actual})")
+        print("Backends agree" if not divergences else "Backends diverge")
+        status = 1 if divergences else 0
+    if args.bench:
+        for name in BACKENDS:
+            print(f"{name}: {benchmark(name, args.ticks, prey=args.prey):.1f} us per tick of agent updates")
+    return status
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
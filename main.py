@@ -1,16 +1,17 @@
-from PyQt5 import QtWidgets, uic, QtCore
+from PyQt5 import QtWidgets, QtCore
 import sys
-import os
-import sluggame
-import numpy as np
+from Cyberslug_User_Interface import Ui_MainWindow
 from simulation_widget import SimulationWidget
-from config import WIDTH, HEIGHT
+from odor_overlay import OVERLAY_MODES
+from plot_widgets import PlotPanel
+from config import WIDTH, HEIGHT, UI_UPDATE_INTERVAL
 
 class MainWindow(QtWidgets.QMainWindow):
     def __init__(self):
         super().__init__()
-        UI_FILE = os.path.join(os.path.dirname(__file__), "Cyberslug_User_Interface.ui")
-        self.ui = uic.loadUi(UI_FILE, self)
+        # Generated from Cyberslug_User_Interface.ui (pyuic5), so no XML is parsed at startup
+        self.ui = Ui_MainWindow()
+        self.ui.setupUi(self)
 
         # Create an instance of simulation widget
         self.simWidget = SimulationWidget()
@@ -26,12 +27,25 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.ui.graphicsView.setFixedSize(WIDTH, HEIGHT)
 
+        # Live plots of slug internals in a dock beside the main layout
+        self.plotPanel = PlotPanel(self.simWidget.recorder)
+        self.plotDock = QtWidgets.QDockWidget("Slug internals", self)
+        self.plotDock.setWidget(self.plotPanel)
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.plotDock)
+
         # Connect Buttons
         self.ui.SetupButton.clicked.connect(self.setup_simulation)
         self.ui.GoButton.clicked.connect(self.simWidget.start_simulation)
         self.ui.StepButton.clicked.connect(self.step_simulation)
         self.ui.pushButton_4.clicked.connect(self.simWidget.toggle_sensors)
 
+        # Odor overlay selector (not part of the .ui layout)
+        self.odorOverlayBox = QtWidgets.QComboBox(self.ui.centralwidget)
+        self.odorOverlayBox.setGeometry(QtCore.QRect(60, 520, 161, 28))
+        self.odorOverlayBox.addItems([f"Odor overlay: {mode}" for mode in OVERLAY_MODES])
+        self.odorOverlayBox.currentIndexChanged.connect(
+            lambda index: self.simWidget.set_odor_overlay(OVERLAY_MODES[index]))
+
         # Connect Sliders
         self.ui.horizontalSlider.valueChanged.connect(lambda value: self.update_prey_population("hermi", value))
         self.ui.horizontalSlider_2.valueChanged.connect(lambda value: self.update_prey_population("flab", value))
@@ -45,6 +59,11 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Initialize sensor visibility
         self.sensors_visible = False
+
+        # One persistent refresh of the readouts; handlers must not start their own
+        self.uiTimer = QtCore.QTimer(self)
+        self.uiTimer.timeout.connect(self.update_UI)
+        self.uiTimer.start(UI_UPDATE_INTERVAL)
         self.update_UI()
 
     def setup_simulation(self):
@@ -59,17 +78,9 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def update_prey_population(self, prey_type, value):
         """Update prey population dynamically based on type."""
-        print(f"{prey_type} population set to: {value}")
-
-        if prey_type == "hermi":
-            self.simWidget.hermi_population = value
-        elif prey_type == "flab":
-            self.simWidget.flab_population = value
-        elif prey_type == "fauxflab":
-            self.simWidget.fauxflab_population = value
-
-        self.simWidget.reset_prey_population()
-        self.update_UI()
+        # Applied incrementally at the next frame, so a slider drag changes the world once per frame;
+        # the readouts catch up on the next uiTimer refresh
+        self.simWidget.request_prey_population(prey_type, value)
 
     def update_simulation_speed(self, value):
         """Adjust simulation speed using the slider."""
@@ -82,59 +93,56 @@ class MainWindow(QtWidgets.QMainWindow):
     def update_learning_hermi(self, value):
         """Adjust hermi learning parameter."""
         print(f"Learning Hermi set to: {value}")
-        self.simWidget.cslug.alpha_hermi = value / 100  # Normalize
+        self.simWidget.sim.cslug.alpha_hermi = value / 100  # Normalize
 
     def update_learning_flab(self, value):
         """Adjust flab learning parameter."""
         print(f"Learning Flab set to: {value}")
-        self.simWidget.cslug.alpha_flab = value / 100  # Normalize
+        self.simWidget.sim.cslug.alpha_flab = value / 100  # Normalize
 
     def update_learning_drug(self, value):
         """Adjust drug learning parameter."""
         print(f"Learning Drug set to: {value}")
-        self.simWidget.cslug.alpha_drug = value / 100  # Normalize
+        self.simWidget.sim.cslug.alpha_drug = value / 100  # Normalize
 
     def update_UI(self):
         """Update UI labels with real-time values."""
         # Simulation ticks
-        self.ui.TicksOutput.setText(str(self.simWidget.tick))
+        self.ui.TicksOutput.setText(str(self.simWidget.sim.tick))
         
         # Somatic map
-        self.ui.lineEdit_16.setText(str(round(self.simWidget.cslug.somatic_map, 2)))
+        self.ui.lineEdit_16.setText(str(round(self.simWidget.sim.cslug.somatic_map, 2)))
 
         # Incentive
-        self.ui.lineEdit_15.setText(str(round(self.simWidget.cslug.incentive, 2)))
+        self.ui.lineEdit_15.setText(str(round(self.simWidget.sim.cslug.incentive, 2)))
 
         # Appetitive State & Switch
-        self.ui.lineEdit_10.setText(str(round(self.simWidget.cslug.app_state, 2)))
-        self.ui.lineEdit_14.setText(str(round(self.simWidget.cslug.app_state_switch, 2)))
+        self.ui.lineEdit_10.setText(str(round(self.simWidget.sim.cslug.app_state, 2)))
+        self.ui.lineEdit_14.setText(str(round(self.simWidget.sim.cslug.app_state_switch, 2)))
 
         # Prey Encounters (Hermi, Flab, Faux-Flab)
-        self.ui.lineEdit_17.setText(str(self.simWidget.cslug.hermi_counter))
-        self.ui.lineEdit_18.setText(str(self.simWidget.cslug.flab_counter))
-        self.ui.lineEdit_19.setText(str(self.simWidget.cslug.drug_counter))
+        self.ui.lineEdit_17.setText(str(self.simWidget.sim.cslug.hermi_counter))
+        self.ui.lineEdit_18.setText(str(self.simWidget.sim.cslug.flab_counter))
+        self.ui.lineEdit_19.setText(str(self.simWidget.sim.cslug.drug_counter))
 
         # Betaine Sensor Values
-        self.ui.lineEdit.setText(str(round(self.simWidget.cslug.sns_odors_left[0], 2)))
-        self.ui.lineEdit_2.setText(str(round(self.simWidget.cslug.sns_odors_right[0], 2)))
-        self.ui.lineEdit_3.setText(str(round(self.simWidget.cslug.sns_odors[0], 2)))
+        self.ui.lineEdit.setText(str(round(self.simWidget.sim.cslug.sns_odors_left[0], 2)))
+        self.ui.lineEdit_2.setText(str(round(self.simWidget.sim.cslug.sns_odors_right[0], 2)))
+        self.ui.lineEdit_3.setText(str(round(self.simWidget.sim.cslug.sns_odors[0], 2)))
 
         # Hermi Sensor Values
-        self.ui.lineEdit_7.setText(str(round(self.simWidget.cslug.sns_odors_left[1], 2)))
-        self.ui.lineEdit_8.setText(str(round(self.simWidget.cslug.sns_odors_right[1], 2)))
-        self.ui.lineEdit_9.setText(str(round(self.simWidget.cslug.sns_odors[1], 2)))
+        self.ui.lineEdit_7.setText(str(round(self.simWidget.sim.cslug.sns_odors_left[1], 2)))
+        self.ui.lineEdit_8.setText(str(round(self.simWidget.sim.cslug.sns_odors_right[1], 2)))
+        self.ui.lineEdit_9.setText(str(round(self.simWidget.sim.cslug.sns_odors[1], 2)))
                                    
         # Flab Sensor Values
-        self.ui.lineEdit_11.setText(str(round(self.simWidget.cslug.sns_odors_left[2], 2)))
-        self.ui.lineEdit_12.setText(str(round(self.simWidget.cslug.sns_odors_right[2], 2)))
-        self.ui.lineEdit_13.setText(str(round(self.simWidget.cslug.sns_odors[2], 2)))
+        self.ui.lineEdit_11.setText(str(round(self.simWidget.sim.cslug.sns_odors_left[2], 2)))
+        self.ui.lineEdit_12.setText(str(round(self.simWidget.sim.cslug.sns_odors_right[2], 2)))
+        self.ui.lineEdit_13.setText(str(round(self.simWidget.sim.cslug.sns_odors[2], 2)))
                                     
         # Learning Variables
-        self.ui.lineEdit_4.setText(str(round(self.simWidget.cslug.Vh, 2)))
-        self.ui.lineEdit_6.setText(str(round(self.simWidget.cslug.Vf, 2)))
-
-        # Recursively update UI
-        QtCore.QTimer.singleShot(100, self.update_UI)
+        self.ui.lineEdit_4.setText(str(round(self.simWidget.sim.cslug.Vh, 2)))
+        self.ui.lineEdit_6.setText(str(round(self.simWidget.sim.cslug.Vf, 2)))
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
@@ -0,0 +1,202 @@
+"""
+Filename: odor_equilibrium.py
+Description: Equilibrium odor fields for warm-starting runs. With the prey held at their initial positions,
+the per-tick deposit, diffusion and decay of the odor patches converge to a fixed point. Diffusion and decay
+are linear, so that fixed point is a sum of steady-state responses to single deposits. The response depends
+only on the diffusion sigma, the decay and the grid size and is computed once per process; per run, only
+the strength of each deposit is solved for so that every deposit cell holds exactly its odor.
+
+Usage:
+    python odor_equilibrium.py --validate
+"""
+
+import argparse
+import functools
+
+import numpy as np
+
+from config import (
+    NUM_ODOR_TYPES, PATCH_WIDTH, PATCH_HEIGHT,
+    ODOR_DIFFUSION_SIGMA, ODOR_DECAY,
+    WARM_START_TOLERANCE, WARM_START_MAX_ITERATIONS, WARM_START_DIRECT_MAX
+)
+from utils import convert_patch_to_coord
+
+
+def deposit_cells(prey_list):
+    """Returns the patch cell and odor vector of every prey as [px, py, odor...] rows, in deposit order."""
+    cells = []
+    for prey in prey_list:
+        px, py = convert_patch_to_coord(prey.x, prey.y)
+        cells.append([px, py] + [float(value) for value in prey.odorlist])
+    return cells
+
+
+def gaussian_weights(sigma):
+    """The 1D kernel scipy.ndimage.gaussian_filter uses (truncated at 4 sigma)."""
+    radius = int(4.0 * sigma + 0.5)
+    x = np.arange(-radius, radius + 1)
+    weights = np.exp(-0.5 / (sigma * sigma) * x ** 2)
+    return weights / weights.sum()
+
+
+@functools.lru_cache(maxsize=None)
+def steady_state_response(sigma=ODOR_DIFFUSION_SIGMA, decay=ODOR_DECAY, width=PATCH_WIDTH, height=PATCH_HEIGHT):
+    """Steady state of one unit deposit per tick: (response, gain).
+
+    gaussian_filter's "reflect" boundary equals periodic filtering of the grid mirrored to (2 * width,
+    2 * height), where the deposit-time field u obeys u = decay * G(u) + deposit, i.e. u = deposit /
+    (1 - decay * G) in Fourier space. `response` is that field for a deposit at the origin of the mirrored
+    torus. `gain` is the same operator in the cosine basis of the unmirrored grid, which it diagonalizes.
+    """
+    weights = gaussian_weights(sigma)
+    radius = len(weights) // 2
+
+    def transfer(size):
+        kernel = np.zeros(size)
+        kernel[np.arange(-radius, radius + 1) % size] = weights
+        return np.fft.fft(kernel).real # real, as the kernel is symmetric
+
+    gx, gy = transfer(2 * width), transfer(2 * height)
+    spectrum = 1.0 / (1.0 - decay * gx[:, None] * gy[None, :])
+    response = np.fft.ifft2(spectrum).real
+    gain = spectrum[:width, :height].copy()
+    response.flags.writeable = False
+    gain.flags.writeable = False
+    return response, gain
+
+
+def _spread(strengths, px, py, gain):
+    """Deposit-time field on the grid for deposits of the given (channels, cells) strengths at unique cells."""
+    from scipy.fft import dctn, idctn
+
+    grid = np.zeros((strengths.shape[0], PATCH_WIDTH, PATCH_HEIGHT))
+    grid[:, px, py] = strengths
+    return idctn(dctn(grid, axes=(1, 2), norm="ortho") * gain, axes=(1, 2), norm="ortho")
+
+
+def _solve_strengths(odors, px, py, response, gain, tolerance, max_iterations):
+    """Deposit strengths (channels, cells) that make the deposit-time field equal `odors` at every cell.
+
+    The system matrix is a block of (I - decay * G)^-1, symmetric with eigenvalues in [1, 1 / (1 - decay)],
+    so it is solved directly for modest cell counts and by conjugate gradients otherwise.
+    """
+    if len(px) <= WARM_START_DIRECT_MAX:
+        # Response between cells: the deposit and its three mirror images on the doubled torus
+        matrix = np.zeros((len(px), len(px)))
+        for x in (px, 2 * PATCH_WIDTH - 1 - px):
+            for y in (py, 2 * PATCH_HEIGHT - 1 - py):
+                matrix += response[(px[:, None] - x[None, :]) % (2 * PATCH_WIDTH),
+                                   (py[:, None] - y[None, :]) % (2 * PATCH_HEIGHT)]
+        return np.linalg.solve(matrix, odors.T).T
+
+    def apply(strengths):
+        return _spread(strengths, px, py, gain)[:, px, py]
+
+    strengths = np.zeros_like(odors)
+    residual = odors.copy()
+    direction = residual.copy()
+    norm = (residual * residual).sum(axis=1)
+    for _ in range(max_iterations):
+        if np.sqrt(norm.max()) <= tolerance:
+            break
+        applied = apply(direction)
+        curvature = (direction * applied).sum(axis=1)
+        step = np.divide(norm, curvature, out=np.zeros_like(norm), where=curvature > 0)
+        strengths += step[:, None] * direction
+        residual -= step[:, None] * applied
+        new_norm = (residual * residual).sum(axis=1)
+        direction = residual + np.divide(new_norm, norm, out=np.zeros_like(norm), where=norm > 0)[:, None] * direction
+        norm = new_norm
+    return strengths
+
+
+def solve_equilibrium(cells, tolerance=WARM_START_TOLERANCE, max_iterations=WARM_START_MAX_ITERATIONS):
+    """Returns the equilibrium field for deposit cells, as PATCHES holds it between ticks.
+
+    Each deposit overwrites all channels of its cell, so later rows win when cells repeat, as in set_patch.
+    """
+    field = np.zeros((NUM_ODOR_TYPES, PATCH_WIDTH, PATCH_HEIGHT))
+    latest = {(int(row[0]), int(row[1])): row[2:] for row in cells}
+    if not latest:
+        return field
+
+    px = np.array([cell[0] for cell in latest], dtype=np.intp)
+    py = np.array([cell[1] for cell in latest], dtype=np.intp)
+    odors = np.array(list(latest.values()), dtype=np.float64).T
+
+    response, gain = steady_state_response()
+    strengths = _solve_strengths(odors, px, py, response, gain, tolerance, max_iterations)
+
+    # Between ticks the field is the deposit-time field minus this tick's deposits
+    field = _spread(strengths, px, py, gain)
+    field[:, px, py] -= strengths
+    return field
+
+
+def iterate_equilibrium(cells, tolerance=WARM_START_TOLERANCE, max_iterations=WARM_START_MAX_ITERATIONS):
+    """Reference: iterates deposit, diffusion and decay from an empty field until it stops changing.
+
+    Returns (field, iterations). Slow, but uses exactly the per-tick operations of the simulation.
+    """
+    from scipy.ndimage import gaussian_filter
+
+    field = np.zeros((NUM_ODOR_TYPES, PATCH_WIDTH, PATCH_HEIGHT))
+    if not cells:
+        return field, 0
+
+    cells = np.asarray(cells, dtype=np.float64)
+    px = cells[:, 0].astype(np.intp)
+    py = cells[:, 1].astype(np.intp)
+    odors = cells[:, 2:].T
+
+    # Diffuse every channel in one call; sigma 0 leaves the channel axis alone
+    sigma = (0, ODOR_DIFFUSION_SIGMA, ODOR_DIFFUSION_SIGMA)
+    for iteration in range(1, max_iterations + 1):
+        previous = field
+        field = field.copy()
+        field[:, px, py] = odors
+        field = gaussian_filter(field, sigma=sigma) * ODOR_DECAY
+        if np.abs(field - previous).max() < tolerance:
+            break
+    return field, iteration
+
+
+def equilibrium_field(prey_list):
+    """Returns the equilibrium field for the current prey positions."""
+    return solve_equilibrium(deposit_cells(prey_list))
+
+
+def validate(seeds=(0, 1, 2), populations=(4, 40, 400)):
+    """Largest difference between solved and iterated fields over a few random prey layouts."""
+    from simulation import Simulation
+
+    worst = 0.0
+    for seed in seeds:
+        for population in populations:
+            sim = Simulation(seed=seed, hermi_population=population, flab_population=population,
+                             fauxflab_population=population, backend="python")
+            cells = deposit_cells(sim.prey_list)
+            reference, _ = iterate_equilibrium(cells)
+            worst = max(worst, float(np.abs(solve_equilibrium(cells) - reference).max()))
+    return worst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check solved equilibrium odor fields against iteration.")
+    parser.add_argument("--validate", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.validate:
+        worst = validate()
+        # The iteration stops once a step changes no cell by more than the tolerance, which leaves it
+        # within tolerance / (1 - decay) of the fixed point
+        limit = 2 * WARM_START_TOLERANCE / (1 - ODOR_DECAY)
+        print(f"Largest difference from iteration: {worst:.3g} (limit {limit:.3g})")
+        return 0 if worst <= limit else 1
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,102 @@
+"""
+Filename: odor_overlay.py
+Description: Heatmap rendering of the odor patch grid. Odor values are mapped to colors through
+precomputed lookup tables on a log scale and upsampled to screen resolution with NumPy only.
+"""
+
+import numpy as np
+
+from config import (
+    WIDTH, HEIGHT, PATCH_WIDTH, PATCH_HEIGHT, NUM_ODOR_TYPES,
+    ODOR_OVERLAY_LOG_MIN, ODOR_OVERLAY_LOG_MAX, ODOR_OVERLAY_COLORS
+)
+
+LUT_SIZE = 256
+
+# Overlay modes in menu order; single channels are indexed by their position in PATCHES
+OVERLAY_MODES = ["off", "betaine", "hermi", "flab", "drug", "composite"]
+CHANNEL_MODES = {"betaine": 0, "hermi": 1, "flab": 2, "drug": 3}
+
+# White (no odor) through yellow and red to dark purple, so the trail and prey stay visible
+HEATMAP_STOPS = [
+    (0.00, (255, 255, 255)),
+    (0.25, (255, 237, 160)),
+    (0.50, (254, 178, 76)),
+    (0.75, (227, 26, 28)),
+    (1.00, (84, 0, 72)),
+]
+
+
+def build_colormap_lut(stops, size=LUT_SIZE):
+    """Interpolates color stops into a (size, 3) uint8 lookup table."""
+    positions = [p for p, _ in stops]
+    colors = np.array([c for _, c in stops], dtype=np.float64)
+    samples = np.linspace(0.0, 1.0, size)
+    lut = np.stack([np.interp(samples, positions, colors[:, k]) for k in range(3)], axis=1)
+    return np.round(lut).astype(np.uint8)
+
+
+def build_absorption_luts(colors, size=LUT_SIZE):
+    """Builds per-channel (size, 3) tables of how much each odor darkens a white pixel."""
+    ramp = np.linspace(0.0, 1.0, size)[:, None]
+    return np.stack([
+        np.round(ramp * (255 - np.array(color, dtype=np.float64))).astype(np.uint16)
+        for color in colors
+    ])
+
+
+class OdorOverlay:
+    def __init__(self):
+        self.mode = "off"
+        self.lut = build_colormap_lut(HEATMAP_STOPS)
+        self.absorption_luts = build_absorption_luts(ODOR_OVERLAY_COLORS[:NUM_ODOR_TYPES])
+
+        # Nearest-neighbour upsampling from the patch grid to the screen
+        self.x_index = np.arange(WIDTH) * PATCH_WIDTH // WIDTH
+        self.y_index = np.arange(HEIGHT) * PATCH_HEIGHT // HEIGHT
+
+        # Reused buffers so a frame allocates nothing proportional to the screen
+        self._log = np.empty((PATCH_WIDTH, PATCH_HEIGHT))
+        self._index = np.empty((PATCH_WIDTH, PATCH_HEIGHT), dtype=np.intp)
+        self._absorbed = np.empty((PATCH_WIDTH, PATCH_HEIGHT, 3), dtype=np.uint16)
+        self._patch_image = np.empty((PATCH_WIDTH, PATCH_HEIGHT, 3), dtype=np.uint8)
+        self._rows = np.empty((WIDTH, PATCH_HEIGHT, 3), dtype=np.uint8)
+        self.frame = np.empty((WIDTH, HEIGHT, 3), dtype=np.uint8)
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def set_mode(self, mode):
+        if mode not in OVERLAY_MODES:
+            raise ValueError(f"Unknown odor overlay mode: {mode}")
+        self.mode = mode
+
+    def quantize(self, field):
+        """Maps an odor channel to LUT indices on a log10 scale."""
+        np.maximum(field, 10 ** ODOR_OVERLAY_LOG_MIN, out=self._log)
+        np.log10(self._log, out=self._log)
+        self._log -= ODOR_OVERLAY_LOG_MIN
+        self._log *= (LUT_SIZE - 1) / (ODOR_OVERLAY_LOG_MAX - ODOR_OVERLAY_LOG_MIN)
+        np.clip(self._log, 0, LUT_SIZE - 1, out=self._log)
+        self._index[...] = self._log
+        return self._index
+
+    def render_patches(self, patches):
+        """Colors the patch grid, returning a (PATCH_WIDTH, PATCH_HEIGHT, 3) uint8 image."""
+        if self.mode == "composite":
+            self._absorbed.fill(0)
+            for channel in range(NUM_ODOR_TYPES):
+                self._absorbed += self.absorption_luts[channel][self.quantize(patches[channel])]
+            np.minimum(self._absorbed, 255, out=self._absorbed)
+            np.subtract(255, self._absorbed, out=self._patch_image, casting="unsafe")
+        else:
+            np.take(self.lut, self.quantize(patches[CHANNEL_MODES[self.mode]]), axis=0, out=self._patch_image)
+        return self._patch_image
+
+    def render(self, patches):
+        """Returns a (WIDTH, HEIGHT, 3) uint8 frame indexed [x, y] as pygame.surfarray expects."""
+        image = self.render_patches(patches)
+        np.take(image, self.x_index, axis=0, out=self._rows)
+        np.take(self._rows, self.y_index, axis=1, out=self.frame)
+        return self.frame
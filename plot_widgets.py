@@ -0,0 +1,92 @@
+# plot_widgets.py
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from config import PLOT_WINDOWS, PLOT_UPDATE_INTERVAL
+
+PLOT_HEIGHT = 70
+PLOT_COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#00a0a0", "#e0569a", "#b8a000"]
+
+
+class TimeSeriesPlot(QtWidgets.QWidget):
+    """Draws the min/max envelope of one recorded series, one vertical line per pixel column."""
+
+    def __init__(self, recorder, name, color, parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+        self.name = name
+        self.pen = QtGui.QPen(QtGui.QColor(color))
+        self.window = PLOT_WINDOWS[0]
+        self.setMinimumHeight(PLOT_HEIGHT)
+
+    def sizeHint(self):
+        return QtCore.QSize(300, PLOT_HEIGHT)
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtCore.Qt.white)
+        painter.setPen(QtCore.Qt.gray)
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+        width, height = self.width() - 2, self.height() - 16
+        starts, mins, maxs = self.recorder.envelope(self.name, self.window, width)
+        label = self.name
+        if len(mins):
+            low, high = float(mins.min()), float(maxs.max())
+            span = (high - low) or 1.0
+            first = self.recorder.pyramid.total - self.window
+
+            def to_y(values):
+                return 14 + (height - 1) * (high - values) / span
+
+            xs = 1 + (starts - first) * width / self.window
+            tops, bottoms = to_y(maxs), to_y(mins)
+
+            # A column spans [min, max]; joining column centres keeps sparse windows readable
+            centres = (tops + bottoms) / 2
+            lines = [QtCore.QLineF(x, top, x, bottom) for x, top, bottom in zip(xs, tops, bottoms)]
+            lines += [QtCore.QLineF(xs[i], centres[i], xs[i + 1], centres[i + 1]) for i in range(len(xs) - 1)]
+            painter.setPen(self.pen)
+            painter.drawLines(lines)
+            label = f"{self.name}  [{round(low, 2)}, {round(high, 2)}]"
+
+        painter.setPen(QtCore.Qt.black)
+        painter.drawText(4, 12, label)
+        painter.end()
+
+
+class PlotPanel(QtWidgets.QWidget):
+    """Stack of live plots with a history-window selector, refreshed on its own timer."""
+
+    def __init__(self, recorder, parent=None):
+        super().__init__(parent)
+        self.recorder = recorder
+
+        layout = QtWidgets.QVBoxLayout(self)
+        self.windowBox = QtWidgets.QComboBox(self)
+        self.windowBox.addItems([f"Last {window:,} ticks" for window in PLOT_WINDOWS])
+        self.windowBox.currentIndexChanged.connect(self.set_window)
+        layout.addWidget(self.windowBox)
+
+        self.plots = []
+        for i, name in enumerate(recorder.names):
+            plot = TimeSeriesPlot(recorder, name, PLOT_COLORS[i % len(PLOT_COLORS)], self)
+            layout.addWidget(plot)
+            self.plots.append(plot)
+        layout.addStretch(1)
+
+        # Redraw cost is bounded by plot width, and the rate is decoupled from the simulation timer
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(PLOT_UPDATE_INTERVAL)
+
+    def set_window(self, index):
+        for plot in self.plots:
+            plot.window = PLOT_WINDOWS[index]
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        self.recorder.flush()
+        for plot in self.plots:
+            plot.update()
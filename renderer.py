@@ -0,0 +1,101 @@
+"""
+Filename: renderer.py
+Description: Draws a Simulation onto an offscreen pygame surface. Shared by the Qt widget and the
+headless frame exporter so both produce identical frames.
+"""
+
+import os
+
+import pygame
+
+from config import (
+    WIDTH, HEIGHT, PATCH_WIDTH, PATCH_HEIGHT, SCALE,
+    WHITE, BLACK, RED,
+    DEBUG_MODE,
+    PREY_RADIUS,
+    SLUG_SPRITE_FILE, SLUG_SPRITE_SIZE
+)
+from odor_overlay import OdorOverlay
+from assets import sprite_surface
+
+
+def init_pygame():
+    """Initializes pygame with an offscreen display unless a display already exists."""
+    if pygame.display.get_init() and pygame.display.get_surface() is not None:
+        return
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+class Renderer:
+    def __init__(self):
+        init_pygame()
+        self.surface = pygame.Surface((WIDTH, HEIGHT))
+        self.slug_sprite = sprite_surface(SLUG_SPRITE_FILE, SLUG_SPRITE_SIZE)
+        self.show_sensors = False
+        self.odor_overlay = OdorOverlay()
+
+    def render(self, sim):
+        """Draws the current state of the simulation and returns the surface."""
+        self.surface.fill(WHITE)
+
+        if self.odor_overlay.enabled:
+            pygame.surfarray.blit_array(self.surface, self.odor_overlay.render(sim.patches))
+
+        self.draw_prey(self.surface, sim.prey_list)
+        self.draw_cyberslug(self.surface, sim)
+
+        if self.show_sensors:
+            self.draw_sensors(self.surface, sim)
+
+        return self.surface
+
+    def tostring(self):
+        """Returns the surface as packed row-major RGB bytes."""
+        return pygame.image.tostring(self.surface, 'RGB')
+
+    def draw_prey(self, surface, prey_list):
+        """Draw all prey in the simulation."""
+        for prey in prey_list:
+            pygame.draw.circle(
+                surface,
+                prey.color,
+                (int(prey.x), int(prey.y)),
+                PREY_RADIUS
+            )
+
+    def draw_cyberslug(self, surface, sim):
+        """Draw the Cyberslug and its path."""
+        cyberslug = sim.cslug
+        if len(cyberslug.path) > 1:
+            segment = []
+            for point in cyberslug.path:
+                if point is None:
+                    if len(segment) > 1:
+                        pygame.draw.lines(surface, BLACK, False, segment, 1)
+                    segment = []
+                else:
+                    segment.append(point)
+            if len(segment) > 1:
+                pygame.draw.lines(surface, BLACK, False, segment, 1)
+
+        # Drawn at the rotation of its collision mask, i.e. the heading before this tick's turn
+        angle = cyberslug.mask.angle if cyberslug.mask is not None else -cyberslug.angle
+        rotated_image = pygame.transform.rotate(self.slug_sprite, angle)
+        surface.blit(rotated_image, rotated_image.get_rect(center=(cyberslug.x, cyberslug.y)).topleft)
+
+    def draw_sensors(self, surface, sim):
+        """Draw every sensor of the slug's sensor array at its sampling position."""
+        cslug = sim.cslug
+        sx, sy = sim.sensor_array.positions(cslug.x, cslug.y, cslug.angle)
+
+        # Patch grid coordinates back to screen pixels
+        screen_x = (sx[0] - PATCH_WIDTH / 2) / SCALE + WIDTH / 2
+        screen_y = (sy[0] - PATCH_HEIGHT / 2) / SCALE + HEIGHT / 2
+        for x, y in zip(screen_x, screen_y):
+            pygame.draw.circle(surface, RED, (int(x), int(y)), 5)
+
+        if DEBUG_MODE:
+            left, right = sim.sensor_array.read(cslug.x, cslug.y, cslug.angle)
+            print(f"Left Sensor: {left}, Right Sensor: {right}")
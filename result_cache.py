@@ -0,0 +1,177 @@
+"""
+Filename: result_cache.py
+Description: Content-addressed on-disk cache of completed simulation runs. Entries are keyed by a hash
+of the full run specification, the simulation-relevant config constants and the engine version, and
+the cache is kept under a size budget by evicting the least recently used entries.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import config
+from config import RESULT_CACHE_DIR, RESULT_CACHE_MAX_BYTES, RESULT_CACHE_EVICT_FRACTION
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Bump when the model changes in a way the source digest below cannot see
+ENGINE_VERSION = "1"
+
+# Modules whose source determines simulation results. config.py is not hashed whole: it also holds UI,
+# export, sweep and cache settings, so only MODEL_CONSTANTS below enter the key
+MODEL_SOURCES = ["sluggame.py", "utils.py", "sensor_array.py", "kernels.py", "simulation.py",
+                 "odor_equilibrium.py", "collision.py", "assets.py"]
+
+
+def engine_version():
+    """Returns ENGINE_VERSION combined with a digest of the model sources."""
+    digest = hashlib.sha1()
+    for name in MODEL_SOURCES:
+        with open(os.path.join(ROOT, name), "rb") as f:
+            digest.update(f.read())
+    return f"{ENGINE_VERSION}-{digest.hexdigest()[:12]}"
+
+
+# Config constants that affect simulation results
+MODEL_CONSTANTS = [
+    "WIDTH", "HEIGHT", "PREY_DISTANCE", "EDGE_DISTANCE", "PREY_RADIUS",
+    "SLUG_SPRITE_FILE", "SLUG_SPRITE_SIZE",
+    "SENSOR_DISTANCE", "SENSOR_ANGLES", "SENSOR_DISTANCES", "SENSOR_INTERPOLATION",
+    "ENCOUNTER_COOLDOWN",
+    "NUM_ODOR_TYPES", "PATCH_WIDTH", "PATCH_HEIGHT", "SCALE", "ODOR_DIFFUSION_SIGMA", "ODOR_DECAY",
+    "FLAB_ODOR", "HERMI_ODOR", "DRUG_ODOR",
+    "WARM_START", "WARM_START_TOLERANCE", "WARM_START_MAX_ITERATIONS", "WARM_START_DIRECT_MAX",
+    "HERMI_POPULATION_DEFAULT", "FLAB_POPULATION_DEFAULT", "FAUXFLAB_POPULATION_DEFAULT",
+    "ALPHA_HERMI", "BETA_HERMI", "LAMBDA_HERMI",
+    "ALPHA_FLAB", "BETA_FLAB", "LAMBDA_FLAB",
+    "ALPHA_DRUG", "BETA_DRUG", "LAMBDA_DRUG",
+]
+
+
+def config_snapshot():
+    """Returns the MODEL_CONSTANTS as JSON-compatible values."""
+    return {name: getattr(config, name) for name in MODEL_CONSTANTS}
+
+
+def spec_key(spec):
+    """Hashes a run specification together with the config and engine version."""
+    payload = {"spec": spec, "config": config_snapshot(), "engine": engine_version()}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=list).encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory=None, max_bytes=RESULT_CACHE_MAX_BYTES):
+        # The default lives in the package, so runs from any working directory share one cache
+        self.directory = directory or os.path.join(ROOT, RESULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.total = None # running size in bytes, measured on first put
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, key):
+        folder = os.path.join(self.directory, key[:2])
+        return os.path.join(folder, key + ".json"), os.path.join(folder, key + ".npz")
+
+    def get(self, key, need_trace=False):
+        """Returns the cached result for a key, or None. A hit refreshes the entry's LRU position."""
+        summary_path, trace_path = self._paths(key)
+        try:
+            with open(summary_path) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        result["trace"] = None
+        if os.path.exists(trace_path):
+            if need_trace:
+                with np.load(trace_path) as data:
+                    result["trace"] = {name: data[name] for name in data.files}
+            os.utime(trace_path)
+        elif need_trace:
+            return None
+        os.utime(summary_path)
+        result["cached"] = True
+        return result
+
+    def put(self, key, result):
+        """Stores a result dict with "spec", "summary" and an optional "trace" of arrays."""
+        summary_path, trace_path = self._paths(key)
+        os.makedirs(os.path.dirname(summary_path), exist_ok=True)
+        if self.total is None:
+            self.total = self.size()
+        replaced = self._file_sizes(summary_path, trace_path)
+
+        if result.get("trace") is not None:
+            tmp = trace_path + f".{os.getpid()}.tmp.npz"
+            np.savez_compressed(tmp, **result["trace"])
+            os.replace(tmp, trace_path)
+
+        # Written last so a visible summary always has its trace in place
+        entry = {"key": key, "spec": result["spec"], "summary": result["summary"], "engine": engine_version()}
+        tmp = summary_path + f".{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp, summary_path)
+
+        # Scanning the cache is O(entries), so only do it once the running total is over budget
+        self.total += self._file_sizes(summary_path, trace_path) - replaced
+        if self.total > self.max_bytes:
+            self.evict()
+
+    def _file_sizes(self, *paths):
+        total = 0
+        for path in paths:
+            try:
+                total += os.stat(path).st_size
+            except OSError:
+                pass
+        return total
+
+    def entries(self):
+        """Lists (last_used, size, paths) per cached key."""
+        grouped = {}
+        for folder, _, files in os.walk(self.directory):
+            for name in files:
+                if ".tmp" in name:
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                key = name.split(".")[0]
+                last_used, size, paths = grouped.get(key, (0.0, 0, []))
+                grouped[key] = (max(last_used, stat.st_mtime), size + stat.st_size, paths + [path])
+        return list(grouped.values())
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Removes least recently used entries once the cache exceeds max_bytes.
+
+        Frees space down to RESULT_CACHE_EVICT_FRACTION of the budget, so a full cache is not rescanned on
+        every put. Also re-measures the running total, which entries written by other processes can skew.
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            self.total = total
+            return
+        for _, size, paths in entries:
+            if total <= self.max_bytes * RESULT_CACHE_EVICT_FRACTION:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+        self.total = total
+
+    def clear(self):
+        for _, _, paths in self.entries():
+            for path in paths:
+                os.remove(path)
+        self.total = 0
@@ -0,0 +1,80 @@
+"""
+Filename: sensor_array.py
+Description: Configurable chemosensor arrays. Every sensor of every slug is sampled from the odor patch
+grid in one vectorized gather, either with the legacy nearest-cell lookup or with bilinear interpolation
+on the torus, and the readings are pooled into the left/right inputs of Cyberslug.update.
+"""
+
+import numpy as np
+
+from config import (
+    WIDTH, HEIGHT, PATCH_WIDTH, PATCH_HEIGHT, SCALE,
+    SENSOR_ANGLES, SENSOR_DISTANCES, SENSOR_INTERPOLATION
+)
+
+INTERPOLATIONS = ("nearest", "bilinear")
+
+
+class SensorArray:
+    def __init__(self, angles=SENSOR_ANGLES, distances=SENSOR_DISTANCES, interpolation=SENSOR_INTERPOLATION,
+                 patches=None):
+        if len(angles) != len(distances):
+            raise ValueError("Sensor angles and distances must have the same length")
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown sensor interpolation: {interpolation}")
+        self.angles = np.asarray(angles, dtype=np.float64)
+        self.distances = np.asarray(distances, dtype=np.float64)
+        self.interpolation = interpolation
+        self.patches = patches # odor grid to sample; a Simulation binds its own
+
+        # Sensors on the left (positive angle) feed the left input, right ones the right input, and
+        # sensors on the midline feed both. Each side averages its raw concentrations.
+        lateral = np.round(np.sin(np.radians(self.angles)), 12)
+        left = (lateral >= 0).astype(np.float64)
+        right = (lateral <= 0).astype(np.float64)
+        self.side_weights = np.stack([left / max(left.sum(), 1), right / max(right.sum(), 1)])
+
+    def positions(self, xs, ys, headings):
+        """Returns continuous patch coordinates of every sensor, each of shape (slugs, sensors)."""
+        xs, ys, headings = (np.atleast_1d(np.asarray(a, dtype=np.float64)) for a in (xs, ys, headings))
+        theta = np.radians(headings[:, None] + self.angles)
+        px = (xs[:, None] - WIDTH / 2) * SCALE + PATCH_WIDTH / 2
+        py = (ys[:, None] - HEIGHT / 2) * SCALE + PATCH_HEIGHT / 2
+        if self.interpolation == "nearest":
+            # Same truncation and clamping as utils.convert_patch_to_coord and utils.sensors
+            px = np.clip(np.trunc(px), 0, PATCH_WIDTH - 1)
+            py = np.clip(np.trunc(py), 0, PATCH_HEIGHT - 1)
+        return px + self.distances * np.cos(theta), py + self.distances * np.sin(theta)
+
+    def sample(self, xs, ys, headings):
+        """Samples all sensors of all slugs at once; returns (slugs, sensors, NUM_ODOR_TYPES)."""
+        if self.patches is None:
+            raise ValueError("SensorArray has no odor grid; pass patches= or set .patches before sampling")
+        sx, sy = self.positions(xs, ys, headings)
+
+        if self.interpolation == "nearest":
+            ix = np.clip(np.trunc(sx), 0, PATCH_WIDTH - 1).astype(np.intp)
+            iy = np.clip(np.trunc(sy), 0, PATCH_HEIGHT - 1).astype(np.intp)
+            return np.moveaxis(self.patches[:, ix, iy], 0, -1)
+
+        # Patch cell i covers [i, i + 1), so its value sits at i + 0.5
+        u, v = sx - 0.5, sy - 0.5
+        x0, y0 = np.floor(u), np.floor(v)
+        tx, ty = u - x0, v - y0
+        x0 = x0.astype(np.intp) % PATCH_WIDTH
+        y0 = y0.astype(np.intp) % PATCH_HEIGHT
+        x1 = (x0 + 1) % PATCH_WIDTH
+        y1 = (y0 + 1) % PATCH_HEIGHT
+
+        corners = self.patches[:, np.stack([x0, x1, x0, x1]), np.stack([y0, y0, y1, y1])]
+        weights = np.stack([(1 - tx) * (1 - ty), tx * (1 - ty), (1 - tx) * ty, tx * ty])
+        return np.moveaxis((corners * weights).sum(axis=1), 0, -1)
+
+    def pool(self, readings):
+        """Pools (..., sensors, NUM_ODOR_TYPES) readings into (..., 2, NUM_ODOR_TYPES) left/right inputs."""
+        return self.side_weights @ readings
+
+    def read(self, x, y, heading):
+        """Returns the (left, right) odor vectors for one slug, as expected by Cyberslug.update."""
+        left, right = self.pool(self.sample(x, y, heading))[0]
+        return left, right
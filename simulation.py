@@ -0,0 +1,232 @@
+"""
+Filename: simulation.py
+Description: GUI-independent simulation core for Cyberslug. Owns the prey population, the slug and the
+per-tick update order so the model can be driven by the Qt widget as well as by headless scripts.
+"""
+
+import copy
+import math
+import random
+
+import numpy as np
+
+from sluggame import Prey, Cyberslug
+from config import (
+    WIDTH, HEIGHT,
+    CYAN, PINK, YELLOW,
+    FLAB_ODOR, HERMI_ODOR, DRUG_ODOR,
+    PATCHES,
+    HERMI_POPULATION_DEFAULT,
+    FLAB_POPULATION_DEFAULT,
+    FAUXFLAB_POPULATION_DEFAULT,
+    TOTAL_TICKS,
+    AGENT_BACKEND,
+    WARM_START,
+    SLUG_SPRITE_FILE, SLUG_SPRITE_SIZE
+)
+from utils import set_patch, update_odors, wrap_around
+from sensor_array import SensorArray
+from kernels import get_backend, convert_slug, convert_prey, move_prey, PreyArrays, ArrayPrey
+from odor_equilibrium import equilibrium_field
+from assets import sprite_alpha
+from collision import RotatedMask, solid_pixels, circle_mask, centered_topleft
+
+# Prey types in spawn order, with their color and odor; populations live in "<type>_population"
+PREY_TYPES = {
+    "hermi": (CYAN, HERMI_ODOR),
+    "flab": (PINK, FLAB_ODOR),
+    "fauxflab": (YELLOW, DRUG_ODOR),
+}
+
+
+class Simulation:
+    def __init__(self, seed=None,
+                 hermi_population=HERMI_POPULATION_DEFAULT,
+                 flab_population=FLAB_POPULATION_DEFAULT,
+                 fauxflab_population=FAUXFLAB_POPULATION_DEFAULT,
+                 sensor_array=None, backend=AGENT_BACKEND, warm_start=WARM_START):
+        # Each simulation owns its random stream and odor grid, so several can run side by side
+        self.rng = random.Random(seed)
+        self.patches = np.zeros_like(PATCHES)
+        self.sensor_array = copy.copy(sensor_array or SensorArray())
+        self.sensor_array.patches = self.patches
+
+        # Under a compiled backend the prey positions and headings live here, so they are moved in place
+        self.prey_arrays = PreyArrays()
+        self.prey_list = []
+        self.prey_by_type = {prey_type: [] for prey_type in PREY_TYPES}
+
+        self.cslug = Cyberslug()
+        self.set_backend(backend)
+        self.slug_solid = solid_pixels(sprite_alpha(SLUG_SPRITE_FILE, SLUG_SPRITE_SIZE))
+
+        self.hermi_population = hermi_population
+        self.flab_population = flab_population
+        self.fauxflab_population = fauxflab_population
+
+        self.reset_prey_population()
+
+        self.warm_start = warm_start
+        if self.warm_start:
+            self.load_equilibrium_odors()
+
+        self.tick = 0
+        self.total_ticks = TOTAL_TICKS
+
+    def set_backend(self, name):
+        """Selects the agent kernel backend ("python", "numba" or "auto"); takes effect next tick."""
+        self.backend = get_backend(name)
+        self.cslug = convert_slug(self.cslug, self.backend)
+
+        prey_list = convert_prey(self.prey_list, self.prey_arrays, self.backend)
+        converted = {id(old): new for old, new in zip(self.prey_list, prey_list)}
+        self.prey_list[:] = prey_list
+        for group in self.prey_by_type.values():
+            group[:] = [converted[id(prey)] for prey in group]
+
+    def reset_prey_population(self):
+        """Rebuild the prey list based on the population settings."""
+        self.prey_list.clear()
+        self.prey_arrays.clear()
+        self.prey_by_type = {prey_type: [] for prey_type in PREY_TYPES}
+
+        for prey_type in PREY_TYPES:
+            for _ in range(getattr(self, f"{prey_type}_population")):
+                self.add_prey(prey_type)
+
+    def set_prey_population(self, prey_type, count):
+        """Adds or removes prey of one type until it has `count` members; other prey are left untouched.
+
+        Costs O(|delta|): new prey are appended, and removed prey are swapped with the last list entry.
+        """
+        if prey_type not in PREY_TYPES:
+            raise ValueError(f"Unknown prey type: {prey_type}")
+        setattr(self, f"{prey_type}_population", count)
+
+        group = self.prey_by_type[prey_type]
+        while len(group) < count:
+            self.add_prey(prey_type)
+        while len(group) > count:
+            self.remove_prey(group.pop())
+
+    def add_prey(self, prey_type):
+        """Spawns one prey of the given type at a random position."""
+        color, odorlist = PREY_TYPES[prey_type]
+        prey = Prey(self.rng.randint(0, WIDTH), self.rng.randint(0, HEIGHT), color, odorlist, self.rng)
+        prey.slot = len(self.prey_list)
+        if self.backend.prey_move is not None:
+            prey = ArrayPrey.from_prey(prey, self.prey_arrays)
+        self.prey_list.append(prey)
+        self.prey_by_type[prey_type].append(prey)
+        return prey
+
+    def remove_prey(self, prey):
+        """Removes one prey from the list in O(1) by moving the last prey into its slot."""
+        slot = prey.slot
+        if isinstance(prey, ArrayPrey):
+            self.prey_arrays.release(slot)
+        last = self.prey_list.pop()
+        if last is not prey:
+            self.prey_list[slot] = last
+            last.slot = slot
+
+    def load_equilibrium_odors(self):
+        """Fills the odor patches with the equilibrium field of the current prey positions."""
+        self.patches[...] = equilibrium_field(self.prey_list)
+
+    def step(self):
+        """Runs one simulation tick without rendering."""
+        self.tick += 1
+
+        self.update_odor_patches()
+        self.move_prey()
+        self.move_cyberslug()
+
+        self.update_slug_mask()
+        self.process_encounters()
+
+    def run(self, ticks):
+        """Runs the given number of ticks."""
+        for _ in range(ticks):
+            self.step()
+
+    def update_odor_patches(self):
+        """Updates odors and deposits new scents."""
+        for prey in self.prey_list:
+            set_patch(prey.x, prey.y, prey.odorlist, self.patches)
+        update_odors(self.patches)
+
+    def move_prey(self):
+        """Moves all prey in the environment."""
+        move_prey(self.prey_list, self.prey_arrays, self.backend, self.rng)
+
+    def process_encounters(self):
+        """Checks if Cyberslug encounters prey and updates counters."""
+        encounter = "none"
+        for prey in self.prey_list:
+            prey_topleft = (prey.x - prey.radius, prey.y - prey.radius)
+            offset_x = int(prey_topleft[0] - self.cslug.mask_topleft[0])
+            offset_y = int(prey_topleft[1] - self.cslug.mask_topleft[1])
+
+            if self.cslug.mask.overlap(self.create_circle_mask(prey.radius), (offset_x, offset_y)):
+                encounter = self.get_encounter_type(prey)
+                prey.respawn()
+
+        sensors_left, sensors_right = self.sensor_array.read(self.cslug.x, self.cslug.y, self.cslug.angle)
+        turn_angle = self.cslug.update(sensors_left, sensors_right, encounter)
+        self.cslug.angle -= 2 * turn_angle
+
+    def get_encounter_type(self, prey):
+        """Determines encounter type based on prey color."""
+        if prey.color == CYAN:
+            return "hermi"
+        elif prey.color == PINK:
+            return "flab"
+        elif prey.color == YELLOW:
+            return "drug"
+        return "none"
+
+    def move_cyberslug(self):
+        """Moves the Cyberslug and updates its path."""
+        self.cslug.x, self.cslug.y = wrap_around(
+            self.cslug.x + self.cslug.speed * math.cos(math.radians(self.cslug.angle)),
+            self.cslug.y + self.cslug.speed * math.sin(math.radians(self.cslug.angle)),
+            self.cslug.path
+        )
+        self.cslug.path.append((self.cslug.x, self.cslug.y))
+
+    def create_circle_mask(self, radius):
+        """Create a mask for a circular prey object."""
+        return circle_mask(radius)
+
+    def update_slug_mask(self):
+        """Rotates the slug's collision mask to its heading and centres it on the slug."""
+        self.cslug.mask = RotatedMask(self.slug_solid, -self.cslug.angle)
+        self.cslug.mask_topleft = centered_topleft(self.cslug.x, self.cslug.y, *self.cslug.mask.size)
+
+    def reset(self):
+        """Reset the slug, prey, and odor patches."""
+        self.tick = 0
+
+        self.cslug.x, self.cslug.y = WIDTH // 2, HEIGHT // 2
+        self.cslug.angle = 0
+        self.cslug.path = [(self.cslug.x, self.cslug.y)]
+
+        self.patches.fill(0)
+
+        # Reset all prey
+        for prey in self.prey_list:
+            prey.respawn()
+
+        if self.warm_start:
+            self.load_equilibrium_odors()
+
+        # Reset counters
+        self.cslug.hermi_counter = 0
+        self.cslug.flab_counter = 0
+        self.cslug.drug_counter = 0
+
+        # Reset appetitive states
+        self.cslug.app_state = 0.0
+        self.cslug.app_state_switch = 0.0
+        self.cslug.reward_experience = 0.0
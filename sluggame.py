@@ -7,10 +7,6 @@ and sensory processing.
 import math
 import random
 
-import pygame 
-import numpy as np
-from scipy.ndimage import gaussian_filter
-
 from config import (
     WIDTH, HEIGHT, PREY_RADIUS, NUM_ODOR_TYPES, 
     ALPHA_HERMI, BETA_HERMI, LAMBDA_HERMI,
@@ -23,25 +19,26 @@ from utils import wrap_around
 
 # --- Prey Class ---
 class Prey:
-    def __init__(self, x, y, color, odorlist):
+    def __init__(self, x, y, color, odorlist, rng=random):
         self.x = x
         self.y = y
         self.color = color
         self.odorlist = odorlist
-        self.angle = random.uniform(0, 360)
+        self.rng = rng # random stream of the owning simulation
+        self.angle = rng.uniform(0, 360)
         self.radius = PREY_RADIUS 
 
     def move(self):
-        self.angle += random.uniform(-1, 1)
+        self.angle += self.rng.uniform(-1, 1)
         step = 0.1
         self.x += step * math.cos(math.radians(self.angle)) # WIDTH
         self.y += step * math.sin(math.radians(self.angle)) # HEIGHT
         self.x, self.y = wrap_around(self.x, self.y)
 
     def respawn(self):
-        self.x = random.randint(0, WIDTH)
-        self.y = random.randint(0, HEIGHT)
-        self.angle = random.uniform(0, 360)
+        self.x = self.rng.randint(0, WIDTH)
+        self.y = self.rng.randint(0, HEIGHT)
+        self.angle = self.rng.uniform(0, 360)
 
 # --- Cyberslug Class ---
 class Cyberslug:
@@ -50,8 +47,7 @@ class Cyberslug:
         self.angle = 0 # degrees
         self.speed = 3
         self.path = [(self.x, self.y)]
-        self.image = pygame.image.load('ASIMOV_slug_sprite.png').convert_alpha()
-        self.mask = pygame.mask.from_surface(self.image)
+        self.mask = None # collision mask, set by Simulation.update_slug_mask
         self.mask_topleft = (self.x, self.y)
 
         # Learning and motivation variables
@@ -158,7 +154,13 @@ class Cyberslug:
         if self.encounter_timer > 0:
             self.encounter_timer -= 1
         
+        self.debug_report(encounter)
+        return self.turn_angle
+
+    def debug_report(self, encounter):
+        """Prints the slug's state on the tick of a new encounter when DEBUG_MODE is on."""
         if DEBUG_MODE and encounter != "none" and self.encounter_timer == (ENCOUNTER_COOLDOWN - 1):
+            sns_betaine, sns_hermi, sns_flab, sns_drug = self.sns_odors
             print(
                 "Tick encountered", encounter, 
                 "Flab:", self.flab_counter, 
@@ -179,6 +181,4 @@ class Cyberslug:
                 "Vh:", round(self.Vh, 2),
                 "Vf:", round(self.Vf, 2),
                 "Vd:", round(self.Vd, 2)
-            )
-        
-        return self.turn_angle
\ No newline at end of file
+            )
\ No newline at end of file
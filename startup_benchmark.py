@@ -0,0 +1,89 @@
+"""
+Filename: startup_benchmark.py
+Description: Startup-time benchmark. Each scenario runs in fresh interpreters so import and initialization
+costs are measured cold, and reports the median wall time together with the heavy modules it loaded.
+
+Usage:
+    python startup_benchmark.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules whose presence in sys.modules marks a heavy dependency being pulled in
+HEAVY_MODULES = ["pygame", "PyQt5.QtWidgets", "scipy.ndimage", "numba"]
+
+# Scenarios use the default configuration (AGENT_BACKEND "auto") unless their name says otherwise
+SCENARIOS = {
+    "import simulation": "import simulation",
+    "headless simulation": "from simulation import Simulation\nSimulation(seed=0).run(10)",
+    "headless simulation, python backend": (
+        "from simulation import Simulation\n"
+        "Simulation(seed=0, backend='python').run(10)"
+    ),
+    "headless simulation, numba backend": (
+        "from simulation import Simulation\n"
+        "Simulation(seed=0, backend='numba').run(10)"
+    ),
+    "batch worker": (
+        "from batch import make_spec, run_simulation\n"
+        "run_simulation(make_spec(ticks=10))"
+    ),
+    "main window": (
+        "from PyQt5 import QtWidgets\n"
+        "app = QtWidgets.QApplication([])\n"
+        "from main import MainWindow\n"
+        "window = MainWindow()\n"
+        "window.show()\n"
+        "app.processEvents()"
+    ),
+}
+
+_HARNESS = """
+import json, sys, time
+start = time.perf_counter()
+exec(compile({code!r}, "<scenario>", "exec"))
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_scenario(code, repeat=5):
+    """Runs code in `repeat` fresh interpreters; returns (median seconds, heavy modules loaded)."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+               SDL_VIDEODRIVER=os.environ.get("SDL_VIDEODRIVER", "dummy"))
+    times, modules = [], []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _HARNESS.format(code=code, heavy=HEAVY_MODULES)],
+            cwd=root, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        modules = result["modules"]
+    return statistics.median(times), modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold startup time of the Cyberslug entry points.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help="scenario names to run")
+    args = parser.parse_args(argv)
+
+    for name in args.scenarios:
+        try:
+            seconds, modules = run_scenario(SCENARIOS[name], args.repeat)
+        except subprocess.CalledProcessError as error:
+            print(f"{name}: failed\n{error.stderr.strip()}")
+            continue
+        print(f"{name}: {seconds * 1000:.0f} ms (loads {', '.join(modules) or 'no heavy modules'})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+"""
+Filename: stream.py
+Description: Library API for consuming Cyberslug simulations as streams. A SimulationStream steps a
+Simulation and yields a TickView per selected tick; the view reads the live simulation state lazily and
+returns read-only arrays that share memory with it where the state is array-backed, so a stream of any
+length runs in constant memory and never touches the GUI. Every Simulation owns its odor grid and random
+stream, so streams over different simulations can be zipped and compared side by side.
+
+Usage:
+    from stream import simulate
+    for view in simulate(seed=0)[1000:50_000:100]:
+        print(view.tick, view.app_state, view.sensors.max())
+
+    for a, b in zip(simulate(seed=0)[:5000:50], simulate(seed=1)[:5000:50]):
+        print(a.tick, a.app_state - b.app_state)
+"""
+
+import sys
+
+import numpy as np
+
+from kernels import STATE_FIELDS
+
+
+def _read_only(array):
+    """Returns a non-writeable view of an array."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class TickView:
+    """Read-only window onto a simulation between two ticks.
+
+    The same view object is reused for every tick of a stream and always reflects the current state, so
+    arrays taken from it change as the stream advances. Use snapshot() to keep values past the next tick.
+    """
+
+    __slots__ = ("_sim",)
+
+    def __init__(self, sim):
+        self._sim = sim
+
+    @property
+    def tick(self):
+        return self._sim.tick
+
+    @property
+    def position(self):
+        """The slug's (x, y, heading in degrees)."""
+        cslug = self._sim.cslug
+        return cslug.x, cslug.y, cslug.angle
+
+    @property
+    def patches(self):
+        """The odor grid, shape (NUM_ODOR_TYPES, PATCH_WIDTH, PATCH_HEIGHT), indexed [channel, x, y]."""
+        return _read_only(self._sim.patches)
+
+    @property
+    def state(self):
+        """The slug's STATE_FIELDS as a float64 array; a view for compiled slugs, a small copy otherwise."""
+        cslug = self._sim.cslug
+        if hasattr(cslug, "state"):
+            return _read_only(cslug.state)
+        return _read_only(np.array([getattr(cslug, name) for name in STATE_FIELDS], dtype=np.float64))
+
+    @property
+    def senses(self):
+        """The slug's log-scaled odor senses as rows (left, right, mean), shape (3, NUM_ODOR_TYPES)."""
+        cslug = self._sim.cslug
+        if hasattr(cslug, "sns_out"):
+            return _read_only(cslug.sns_out)
+        return _read_only(np.array([cslug.sns_odors_left, cslug.sns_odors_right, cslug.sns_odors],
+                                   dtype=np.float64))
+
+    @property
+    def sensors(self):
+        """Raw concentrations at every sensor of the array, shape (sensors, NUM_ODOR_TYPES)."""
+        cslug = self._sim.cslug
+        return _read_only(self._sim.sensor_array.sample(cslug.x, cslug.y, cslug.angle)[0])
+
+    @property
+    def prey(self):
+        """Prey (x, y, heading) rows, shape (prey, 3); a view of the prey arrays under compiled backends."""
+        sim = self._sim
+        if sim.backend.prey_move is not None:
+            return _read_only(sim.prey_arrays.state[:, :sim.prey_arrays.count].T)
+        return _read_only(np.array([(prey.x, prey.y, prey.angle) for prey in sim.prey_list],
+                                   dtype=np.float64).reshape(-1, 3))
+
+    def __getattr__(self, name):
+        # Any other slug attribute, e.g. view.app_state or view.hermi_counter
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return getattr(self._sim.cslug, name)
+        except AttributeError:
+            raise AttributeError(f"TickView has no field {name!r}") from None
+
+    def snapshot(self, fields=("tick", "position", "state", "senses")):
+        """Copies the named fields into a dict that stays valid after the stream advances."""
+        values = {}
+        for name in fields:
+            value = getattr(self, name)
+            values[name] = value.copy() if isinstance(value, np.ndarray) else value
+        return values
+
+
+class SimulationStream:
+    """Iterable of TickViews over a simulation, sliceable like itertools.islice.
+
+    Index i is the state after the (i + 1)-th step of an iteration, so stream[:1000:10] yields the views
+    after steps 1, 11, ..., 991. Every tick is simulated; the stride only selects which are yielded. The
+    simulation is shared by all slices of a stream and each iteration continues from where it stands.
+    """
+
+    def __init__(self, sim=None, indices=None, **sim_kwargs):
+        if sim is None:
+            from simulation import Simulation
+            sim = Simulation(**sim_kwargs)
+        elif sim_kwargs:
+            raise TypeError("Simulation arguments cannot be combined with an existing simulation")
+        self.sim = sim
+        self.indices = indices if indices is not None else range(0, sys.maxsize)
+
+    def __getitem__(self, item):
+        if isinstance(item, int):
+            if item < 0:
+                raise ValueError("Stream indices must be non-negative")
+            return next(iter(self[item:item + 1]))
+        if not isinstance(item, slice):
+            raise TypeError("Streams can be indexed with integers or slices")
+        for bound in (item.start, item.stop, item.step):
+            if bound is not None and bound < 0:
+                raise ValueError("Stream slices must be non-negative, as with itertools.islice")
+        if item.step == 0:
+            raise ValueError("Stream slice step cannot be zero")
+        return SimulationStream(self.sim, self.indices[item])
+
+    def __iter__(self):
+        view = TickView(self.sim)
+        index = 0
+        for selected in self.indices:
+            while index <= selected:
+                self.sim.step()
+                index += 1
+            yield view
+
+
+def simulate(sim=None, **sim_kwargs):
+    """Returns an unbounded SimulationStream over a new Simulation(**sim_kwargs), or over sim."""
+    return SimulationStream(sim, **sim_kwargs)
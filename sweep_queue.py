@@ -0,0 +1,315 @@
+"""
+Filename: sweep_queue.py
+Description: Multi-node parameter sweeps coordinated through a shared directory, with no broker.
+
+A sweep directory holds one JSON file per work unit and moves it between subdirectories:
+    pending/<unit>.json              waiting to be claimed
+    running/<unit>.<worker>.json     claimed by an atomic rename; its mtime is the worker's heartbeat
+    results/<unit>.json              written atomically by the worker once the unit is done (or has failed)
+    merged.jsonl                     one line per run, appended by the coordinator as results arrive
+
+Claims whose heartbeat is older than SWEEP_STALE_TIMEOUT are renamed back to pending/. Runs are
+deterministic per spec, so a unit finished twice after a false timeout simply yields the same result.
+Heartbeats are compared against the local clock, so keep node clocks roughly in sync.
+
+Usage:
+    python sweep_queue.py create sweep --seeds 0 1 2 3 --grid alpha_hermi=0.1,0.5,0.9 --unit-size 3
+    python sweep_queue.py worker sweep          # on any number of machines
+    python sweep_queue.py coordinate sweep      # merges results and requeues stale claims
+"""
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import threading
+import time
+
+from batch import make_spec, run_batch, parse_assignments
+from config import SWEEP_POLL_INTERVAL, SWEEP_HEARTBEAT_INTERVAL, SWEEP_STALE_TIMEOUT
+
+SUBDIRS = ("pending", "running", "results")
+
+
+def _write_json(path, data):
+    """Writes JSON through a uniquely named temporary file and an atomic rename."""
+    tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _unit_id(filename):
+    return filename.split(".")[0]
+
+
+def create_sweep(directory, specs, unit_size=1):
+    """Splits specs into work units in a new sweep directory and returns the number of units."""
+    for name in SUBDIRS:
+        os.makedirs(os.path.join(directory, name), exist_ok=True)
+    specs = [make_spec(**spec) for spec in specs]
+    units = [specs[i:i + unit_size] for i in range(0, len(specs), unit_size)]
+    for index, unit in enumerate(units):
+        _write_json(os.path.join(directory, "pending", f"{index:06d}.json"), {"specs": unit})
+    _write_json(os.path.join(directory, "sweep.json"), {"units": len(units), "specs": len(specs)})
+    return len(units)
+
+
+def claim_unit(directory, worker_id):
+    """Claims the next pending unit; returns (unit_id, running_path, specs) or None."""
+    pending = os.path.join(directory, "pending")
+    for filename in sorted(os.listdir(pending)):
+        if not filename.endswith(".json") or ".tmp" in filename:
+            continue
+        unit = _unit_id(filename)
+        running_path = os.path.join(directory, "running", f"{unit}.{worker_id}.json")
+        pending_path = os.path.join(pending, filename)
+        try:
+            # Touch first: rename keeps the mtime from sweep creation, which would make the
+            # fresh claim look stale to requeue_stale
+            os.utime(pending_path)
+            os.rename(pending_path, running_path)
+            with open(running_path) as f:
+                return unit, running_path, json.load(f)["specs"]
+        except FileNotFoundError:
+            continue # another worker won the race, or the claim was requeued before we read it
+    return None
+
+
+class Heartbeat:
+    """Touches a claimed unit file periodically while the unit is being simulated."""
+
+    def __init__(self, path, interval=SWEEP_HEARTBEAT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._beat, daemon=True)
+
+    def _beat(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return # the claim was requeued; finishing anyway is harmless
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stopped.set()
+        self.thread.join()
+
+
+def run_worker(directory, worker_id=None, exit_when_idle=True, poll_interval=SWEEP_POLL_INTERVAL, cache=False):
+    """Claims and runs units until none remain; returns the number of units completed."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    completed = 0
+    while True:
+        claim = claim_unit(directory, worker_id)
+        if claim is None:
+            # Idle workers also reap, so a dead peer's units are retried even without a coordinator
+            requeue_stale(directory)
+            if exit_when_idle and not os.listdir(os.path.join(directory, "running")):
+                return completed
+            time.sleep(poll_interval)
+            continue
+
+        unit, running_path, specs = claim
+        try:
+            with Heartbeat(running_path):
+                results = run_batch(specs, cache=cache)
+            records = [{"spec": r["spec"], "summary": r["summary"], "key": r["key"]} for r in results]
+        except Exception as error:
+            # Deterministic runs fail the same way everywhere, so record the failure rather than leave
+            # the claim to be requeued and crash the next worker too
+            message = f"{type(error).__name__}: {error}"
+            records = [{"spec": spec, "summary": None, "key": None, "error": message} for spec in specs]
+        _write_json(os.path.join(directory, "results", f"{unit}.json"),
+                    {"unit": unit, "worker": worker_id, "results": records})
+        try:
+            os.remove(running_path)
+        except FileNotFoundError:
+            pass
+        completed += 1
+
+
+def requeue_stale(directory, timeout=SWEEP_STALE_TIMEOUT):
+    """Moves claims without a recent heartbeat back to pending/; returns the requeued unit ids."""
+    running = os.path.join(directory, "running")
+    results = os.path.join(directory, "results")
+    now = time.time()
+    requeued = []
+    for filename in os.listdir(running):
+        path = os.path.join(running, filename)
+        unit = _unit_id(filename)
+        try:
+            if now - os.stat(path).st_mtime < timeout:
+                continue
+            if os.path.exists(os.path.join(results, unit + ".json")):
+                os.remove(path)
+                continue
+            os.rename(path, os.path.join(directory, "pending", unit + ".json"))
+            requeued.append(unit)
+        except FileNotFoundError:
+            continue # finished or reaped concurrently
+    return requeued
+
+
+class SweepCoordinator:
+    """Incrementally merges finished units into merged.jsonl and requeues dead workers' claims."""
+
+    def __init__(self, directory, stale_timeout=SWEEP_STALE_TIMEOUT):
+        self.directory = directory
+        self.stale_timeout = stale_timeout
+        self.merged_path = os.path.join(directory, "merged.jsonl")
+        with open(os.path.join(directory, "sweep.json")) as f:
+            self.total_units = json.load(f)["units"]
+
+        self.merged_units = self._recover()
+
+    def _recover(self):
+        """Returns the units merged by a previous coordinator, cutting off an append it did not finish.
+
+        Units are appended one at a time, so only the last one can be torn: a trailing partial line is
+        dropped, and so are the lines of a last unit that has fewer records than its results file.
+        """
+        try:
+            with open(self.merged_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return set()
+
+        end = data.rfind(b"\n") + 1
+        counts, last_unit, last_start, offset = {}, None, 0, 0
+        for line in data[:end].splitlines(keepends=True):
+            if line.strip():
+                unit = json.loads(line)["unit"]
+                if unit != last_unit:
+                    last_unit, last_start = unit, offset
+                counts[unit] = counts.get(unit, 0) + 1
+            offset += len(line)
+        if last_unit is not None and counts[last_unit] < self._record_count(last_unit):
+            end = last_start
+            del counts[last_unit]
+
+        if end < len(data):
+            with open(self.merged_path, "r+b") as f:
+                f.truncate(end)
+                os.fsync(f.fileno())
+        return set(counts)
+
+    def _record_count(self, unit):
+        try:
+            with open(os.path.join(self.directory, "results", unit + ".json")) as f:
+                return len(json.load(f)["results"])
+        except (OSError, ValueError):
+            return 0 # nothing to compare against; keep what was merged
+
+    def merge_new(self):
+        """Appends results of newly finished units and returns how many units were merged.
+
+        Runs of a failed unit are merged with "summary": None and the worker's "error".
+        """
+        results_dir = os.path.join(self.directory, "results")
+        new_units = sorted(
+            _unit_id(name) for name in os.listdir(results_dir)
+            if name.endswith(".json") and ".tmp" not in name and _unit_id(name) not in self.merged_units
+        )
+        if not new_units:
+            return 0
+        with open(self.merged_path, "a") as out:
+            for unit in new_units:
+                with open(os.path.join(results_dir, unit + ".json")) as f:
+                    records = json.load(f)["results"]
+                # One write and fsync per unit, so a crash can only tear the unit being appended
+                out.write("".join(json.dumps(dict(record, unit=unit)) + "\n" for record in records))
+                out.flush()
+                os.fsync(out.fileno())
+                self.merged_units.add(unit)
+        return len(new_units)
+
+    @property
+    def done(self):
+        return len(self.merged_units) >= self.total_units
+
+    def step(self):
+        requeued = requeue_stale(self.directory, self.stale_timeout)
+        merged = self.merge_new()
+        return merged, requeued
+
+    def run(self, poll_interval=SWEEP_POLL_INTERVAL, verbose=True):
+        """Polls until every unit is merged."""
+        while True:
+            merged, requeued = self.step()
+            if verbose and (merged or requeued):
+                print(f"{len(self.merged_units)}/{self.total_units} units merged"
+                      + (f", requeued {', '.join(requeued)}" if requeued else ""))
+            if self.done:
+                return
+            time.sleep(poll_interval)
+
+
+def load_merged(directory):
+    """Returns the merged run records of a sweep."""
+    with open(os.path.join(directory, "merged.jsonl")) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def grid_specs(seeds, grid, fixed):
+    """Expands a parameter grid (name -> list of values) over seeds into run specs."""
+    names = sorted(grid)
+    specs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        for seed in seeds:
+            specs.append(dict(fixed, seed=seed, **dict(zip(names, values))))
+    return specs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared-directory sweep queue for headless Cyberslug runs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="write work units for a sweep")
+    create.add_argument("directory")
+    create.add_argument("--seeds", type=int, nargs="+", default=[0])
+    create.add_argument("--ticks", type=int, default=5000)
+    create.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...")
+    create.add_argument("--set", action="append", default=[], metavar="NAME=VALUE")
+    create.add_argument("--unit-size", type=int, default=1)
+
+    worker = commands.add_parser("worker", help="claim and run units")
+    worker.add_argument("directory")
+    worker.add_argument("--worker-id", default=None)
+    worker.add_argument("--keep-polling", action="store_true", help="wait for new units instead of exiting")
+
+    coordinate = commands.add_parser("coordinate", help="merge results and requeue stale claims")
+    coordinate.add_argument("directory")
+    coordinate.add_argument("--stale-timeout", type=float, default=SWEEP_STALE_TIMEOUT)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        fixed = dict(parse_assignments(args.set), ticks=args.ticks)
+        grid = {}
+        for item in args.grid:
+            name, _, values = item.partition("=")
+            grid[name] = [parse_assignments([f"{name}={v}"])[name] for v in values.split(",")]
+        count = create_sweep(args.directory, grid_specs(args.seeds, grid, fixed), args.unit_size)
+        print(f"Created {count} work units in {args.directory}")
+    elif args.command == "worker":
+        count = run_worker(args.directory, args.worker_id, exit_when_idle=not args.keep_polling)
+        print(f"Worker finished {count} units")
+    else:
+        SweepCoordinator(args.directory, args.stale_timeout).run()
+        failed = [record for record in load_merged(args.directory) if record.get("error")]
+        print(f"Sweep complete: {os.path.join(args.directory, 'merged.jsonl')}"
+              + (f" ({len(failed)} runs failed, e.g. {failed[0]['error']})" if failed else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
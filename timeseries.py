@@ -0,0 +1,150 @@
+"""
+Filename: timeseries.py
+Description: Fixed-memory history of slug internals for live plotting. Samples are staged cheaply every
+tick and folded in batches into a pyramid of min/max ring buffers, so any window up to the full history
+can be drawn at a cost bounded by the plot's pixel width.
+"""
+
+from operator import attrgetter
+
+import numpy as np
+
+from config import PLOT_HISTORY_TICKS, PLOT_LEVEL_CAPACITY, PLOT_DECIMATION_BASE
+
+STAGING_SIZE = 1024
+
+
+class MinMaxPyramid:
+    """Ring buffers of (min, max) per block, with blocks of base**level samples at each level."""
+
+    def __init__(self, num_series, history=PLOT_HISTORY_TICKS,
+                 level_capacity=PLOT_LEVEL_CAPACITY, base=PLOT_DECIMATION_BASE):
+        self.num_series = num_series
+        self.capacity = level_capacity
+        self.base = base
+
+        self.levels = 1
+        while level_capacity * base ** (self.levels - 1) < history:
+            self.levels += 1
+
+        self.mins = [np.empty((level_capacity, num_series)) for _ in range(self.levels)]
+        self.maxs = [np.empty((level_capacity, num_series)) for _ in range(self.levels)]
+        self.clear()
+
+    def clear(self):
+        self.heads = [0] * self.levels
+        self.counts = [0] * self.levels
+        # Entries of each level not yet folded into a block of the next level
+        self.carry_mins = [np.empty((0, self.num_series)) for _ in range(self.levels)]
+        self.carry_maxs = [np.empty((0, self.num_series)) for _ in range(self.levels)]
+        self.total = 0
+
+    def _push(self, level, mins, maxs):
+        n = len(mins)
+        if n >= self.capacity:
+            self.mins[level][:] = mins[-self.capacity:]
+            self.maxs[level][:] = maxs[-self.capacity:]
+            self.heads[level] = 0
+            self.counts[level] = self.capacity
+            return
+        index = (self.heads[level] + np.arange(n)) % self.capacity
+        self.mins[level][index] = mins
+        self.maxs[level][index] = maxs
+        self.heads[level] = (self.heads[level] + n) % self.capacity
+        self.counts[level] = min(self.capacity, self.counts[level] + n)
+
+    def extend(self, values):
+        """Adds an (n, num_series) batch of samples."""
+        if not len(values):
+            return
+        self.total += len(values)
+        mins = maxs = values
+        for level in range(self.levels):
+            self._push(level, mins, maxs)
+            if level + 1 == self.levels:
+                break
+            pending_mins = np.concatenate([self.carry_mins[level], mins])
+            pending_maxs = np.concatenate([self.carry_maxs[level], maxs])
+            full = len(pending_mins) // self.base * self.base
+            self.carry_mins[level] = pending_mins[full:]
+            self.carry_maxs[level] = pending_maxs[full:]
+            if not full:
+                break
+            mins = pending_mins[:full].reshape(-1, self.base, self.num_series).min(axis=1)
+            maxs = pending_maxs[:full].reshape(-1, self.base, self.num_series).max(axis=1)
+
+    def _latest(self, level, series, m):
+        index = (self.heads[level] - m + np.arange(m)) % self.capacity
+        return self.mins[level][index, series], self.maxs[level][index, series]
+
+    def envelope(self, series, window, width):
+        """Returns (sample_index, mins, maxs) columns covering the last `window` samples.
+
+        At most `width` columns are returned, and at most min(capacity, width * base) stored entries
+        are read regardless of how long the history is.
+        """
+        window = min(window, self.total)
+        if window <= 0 or width <= 0:
+            empty = np.empty(0)
+            return empty, empty, empty
+
+        limit = min(self.capacity, width * self.base)
+        level = 0
+        while level + 1 < self.levels and -(-window // self.base ** level) > limit:
+            level += 1
+        block = self.base ** level
+
+        m = min(self.counts[level], window // block)
+        mins, maxs = self._latest(level, series, m)
+        starts = self.total - (self.total % block) - block * (m - np.arange(m))
+
+        # The newest, still incomplete block is assembled from the carries of the finer levels
+        partial = self.total % block
+        if partial:
+            carry_mins = np.concatenate([self.carry_mins[k][:, series] for k in range(level)])
+            carry_maxs = np.concatenate([self.carry_maxs[k][:, series] for k in range(level)])
+            mins = np.append(mins, carry_mins.min())
+            maxs = np.append(maxs, carry_maxs.max())
+            starts = np.append(starts, self.total - partial)
+
+        if len(mins) > width:
+            edges = np.arange(width) * len(mins) // width
+            mins = np.minimum.reduceat(mins, edges)
+            maxs = np.maximum.reduceat(maxs, edges)
+            starts = starts[edges]
+        return starts, mins, maxs
+
+
+class TimeSeriesRecorder:
+    """Records named attributes of an object every tick into a MinMaxPyramid."""
+
+    def __init__(self, names, history=PLOT_HISTORY_TICKS):
+        self.names = list(names)
+        self.getter = attrgetter(*self.names)
+        self.pyramid = MinMaxPyramid(len(self.names), history)
+        self.staging = np.empty((STAGING_SIZE, len(self.names)))
+        self.pending = 0
+
+    def record(self, obj):
+        """Stages one sample; only touches a preallocated row so the tick loop stays cheap."""
+        self.staging[self.pending] = self.getter(obj)
+        self.pending += 1
+        if self.pending == STAGING_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Folds staged samples into the pyramid."""
+        if self.pending:
+            self.pyramid.extend(self.staging[:self.pending])
+            self.pending = 0
+
+    def clear(self):
+        self.pending = 0
+        self.pyramid.clear()
+
+    @property
+    def total(self):
+        return self.pyramid.total + self.pending
+
+    def envelope(self, name, window, width):
+        return self.pyramid.envelope(self.names.index(name), window, width)